@@ -0,0 +1,361 @@
+"""
+Local stand-in of the MIKE CLOUD metadata and timeseries REST API for benchmarks.
+
+It implements the endpoints used by mikecloudio with generated data held in memory, and can add latency to every
+response and answer a share of the requests with errors to exercise retries.
+
+Example::
+
+    service = FakeService(latency=0.01, error_rate=0.05)
+    url = service.start()
+    service.add_timeseries("d1", "t1", rows=100000)
+    con = mikecloudio.Connection("key", project_id=service.project_id, service_url=url)
+    ...
+    service.stop()
+
+For measurements, start_process() runs the service in a separate process, so that neither its memory nor its
+share of the GIL is attributed to the client.
+"""
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+START = np.datetime64("2000-01-01T00:00:00")
+STEP = np.timedelta64(60, "s")
+
+
+class FakeTimeseries:
+
+    def __init__(self, id, name, rows=0, data_fields=0, data_type="Double"):
+        """
+        Timeseries of the fake service holding rows values at one minute steps from 2000-01-01,
+        with data_fields additional Double fields. The response rows are formatted once when created.
+        """
+        self.id = id
+        self.name = name
+        self.data_type = data_type
+        self.data_fields = [{"name": "field{0}".format(i), "dataType": "Double"} for i in range(data_fields)]
+        self.rows = _format_rows(rows, data_fields)
+        self._body = None
+        self.uploaded_rows = 0
+        self.uploaded_bytes = 0
+        self.properties = {}
+
+    def info(self):
+        return {"id": self.id,
+                "item": {"name": self.name, "unit": "eumUmeter", "item": "eumIWaterLevel",
+                         "dataType": self.data_type},
+                "dataFields": self.data_fields,
+                "properties": dict(self.properties)}
+
+    def values(self, time_from=None, time_to=None):
+        if time_from is None and time_to is None:
+            if self._body is None:
+                self._body = _body(self.rows)
+            return self._body
+        first = 0 if time_from is None else _position(time_from, ceil=True)
+        last = len(self.rows) if time_to is None else _position(time_to, ceil=False) + 1
+        return _body(self.rows[max(first, 0):max(last, 0)])
+
+
+class FakeService:
+
+    def __init__(self, latency=0.0, error_rate=0.0, error_status=503, seed=0, failures=None):
+        """
+        :param latency: seconds every response is delayed
+        :type latency: float
+        :param error_rate: share of requests answered with error_status instead of being processed
+        :type error_rate: float
+        :param error_status: status code of injected errors
+        :type error_status: int
+        :param seed: seed of the error injection
+        :type seed: int
+        :param failures: status code answered by an endpoint instead of processing the request, by name of its\
+            handler, e.g. {"upload": 500}
+        :type failures: dict
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.failures = dict(failures or {})
+        self.project_id = "p1"
+        self.project_name = "benchmark"
+        self.datasets = {}
+        self.requests = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self, host="127.0.0.1", port=0):
+        """
+        start serving in a background thread
+
+        :return: service url to pass to mikecloudio.Connection
+        :rtype: str
+        """
+        service = self
+
+        class Handler(_Handler):
+            pass
+        Handler.service = service
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return "http://{0}:{1}/".format(host, self._server.server_port)
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def add_dataset(self, id, name=None):
+        self.datasets.setdefault(id, {"id": id, "name": name or id, "timeseries": {}})
+        return self.datasets[id]
+
+    def add_timeseries(self, id_dataset, id, name=None, rows=0, data_fields=0, data_type="Double"):
+        """
+        add a timeseries with generated values; the dataset is created if it does not exist
+
+        :return: the timeseries
+        :rtype: FakeTimeseries
+        """
+        ts = FakeTimeseries(id, name or id, rows, data_fields, data_type)
+        self.add_dataset(id_dataset)["timeseries"][id] = ts
+        return ts
+
+    def count(self, kind):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def inject_error(self):
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+
+def start_process(setup=None, setup_args=(), timeout=600, **kwargs):
+    """
+    run a FakeService in a separate process
+
+    :param setup: module level function called as setup(service, *setup_args) in the new process before serving,\
+        e.g. to add timeseries
+    :type setup: callable
+    :param setup_args: further arguments of setup
+    :type setup_args: tuple
+    :param timeout: seconds to wait for the service to start
+    :type timeout: float
+    :param kwargs: arguments of FakeService
+    :return: service url and the process; terminate the process to stop the service
+    :rtype: tuple
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_serve, args=(queue, setup, setup_args, kwargs), daemon=True)
+    process.start()
+    return queue.get(timeout=timeout), process
+
+
+def _serve(queue, setup, setup_args, kwargs):
+    service = FakeService(**kwargs)
+    if setup is not None:
+        setup(service, *setup_args)
+    queue.put(service.start())
+    threading.Event().wait()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _handle(self, method):
+        service = self.service
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        if service.latency:
+            time.sleep(service.latency)
+        if service.inject_error():
+            service.count("error")
+            return self._send({"error": "injected"}, service.error_status, {"Retry-After": "0"})
+
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        for pattern, route_method, handler in ROUTES:
+            match = pattern.fullmatch(url.path)
+            if match and route_method == method:
+                service.count(handler.__name__)
+                if handler.__name__ in service.failures:
+                    return self._send({"error": "injected"}, service.failures[handler.__name__])
+                try:
+                    result = handler(service, body, query, *match.groups())
+                except KeyError as e:
+                    return self._send({"error": "not found: {0}".format(e)}, 404)
+                return self._send(*result) if isinstance(result, tuple) else self._send(result)
+        self._send({"error": "unknown endpoint {0} {1}".format(method, url.path)}, 404)
+
+    def _send(self, payload, status=200, headers=None):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def project_list(service, body, query):
+    return {"data": [{"id": service.project_id, "name": service.project_name}]}
+
+
+def subprojects(service, body, query, project):
+    return {"data": []}
+
+
+def dataset_list(service, body, query, project, summaries):
+    return {"data": [{"id": ds["id"], "name": ds["name"], "datasetType": "timeseries"}
+                     for ds in service.datasets.values()]}
+
+
+def dataset_info(service, body, query, project, id_dataset):
+    ds = service.datasets[id_dataset]
+    return {"id": ds["id"], "name": ds["name"], "datasetType": "timeseries"}
+
+
+def dataset_delete(service, body, query, project, id_dataset):
+    service.datasets.pop(id_dataset)
+    return {}
+
+
+def dataset_create(service, body, query):
+    spec = json.loads(body)
+    id = str(uuid.uuid4())
+    service.add_dataset(id, spec.get("name"))
+    return {"id": id, "name": spec.get("name")}
+
+
+def schema(service, body, query, id_dataset):
+    names = service.datasets[id_dataset].get("properties", [])
+    return {"timeSeriesProperties": [{"name": name, "dataType": "Text"} for name in names]}
+
+
+def ts_list(service, body, query, id_dataset):
+    return {"data": [ts.info() for ts in service.datasets[id_dataset]["timeseries"].values()]}
+
+
+def ts_create(service, body, query, id_dataset):
+    spec = json.loads(body)
+    ts = service.add_timeseries(id_dataset, str(uuid.uuid4()), spec["item"]["name"],
+                                data_type=spec["item"].get("dataType", "Double"))
+    ts.data_fields = spec.get("dataFields", [])
+    return {"id": ts.id}
+
+
+def ts_info(service, body, query, id_dataset, id_timeseries):
+    return service.datasets[id_dataset]["timeseries"][id_timeseries].info()
+
+
+def ts_properties(service, body, query, id_dataset, id_timeseries):
+    ts = service.datasets[id_dataset]["timeseries"][id_timeseries]
+    ts.properties.update(json.loads(body)["properties"])
+    return ts.info()
+
+
+def ts_delete(service, body, query, id_dataset, id_timeseries):
+    service.datasets[id_dataset]["timeseries"].pop(id_timeseries)
+    return {}
+
+
+def values(service, body, query, id_dataset, id_timeseries):
+    ts = service.datasets[id_dataset]["timeseries"][id_timeseries]
+    return ts.values(query.get("from"), query.get("to"))
+
+
+def values_delete(service, body, query, id_dataset, id_timeseries):
+    service.datasets[id_dataset]["timeseries"][id_timeseries]
+    return {}
+
+
+def upload(service, body, query, id_dataset, id_timeseries):
+    ts = service.datasets[id_dataset]["timeseries"][id_timeseries]
+    # counting rows by their opening brackets avoids decoding the body on the server side
+    rows = body.count(b"[") - 1
+    with service._lock:
+        ts.uploaded_rows += max(rows, 0)
+        ts.uploaded_bytes += len(body)
+    return {}
+
+
+def upload_url(service, body, query):
+    return {"data": "https://example.invalid/upload/{0}".format(uuid.uuid4())}
+
+
+def import_start(service, body, query):
+    return {"id": str(uuid.uuid4()), "status": "Pending"}
+
+
+ROUTES = [
+    (re.compile(r"/api/project/list"), "GET", project_list),
+    (re.compile(r"/api/project/([^/]+)/subprojects"), "GET", subprojects),
+    (re.compile(r"/api/project/([^/]+)/dataset/list(-summaries)?"), "GET", dataset_list),
+    (re.compile(r"/api/project/([^/]+)/dataset/([^/]+)"), "GET", dataset_info),
+    (re.compile(r"/api/project/([^/]+)/dataset/([^/]+)"), "DELETE", dataset_delete),
+    (re.compile(r"/api/ts/dataset"), "POST", dataset_create),
+    (re.compile(r"/api/ts/([^/]+)"), "GET", schema),
+    (re.compile(r"/api/ts/([^/]+)/timeseries/list"), "GET", ts_list),
+    (re.compile(r"/api/ts/([^/]+)/timeseries"), "POST", ts_create),
+    (re.compile(r"/api/ts/([^/]+)/([^/]+)"), "PUT", ts_properties),
+    (re.compile(r"/api/ts/([^/]+)/timeseries/([^/]+)"), "GET", ts_info),
+    (re.compile(r"/api/ts/([^/]+)/timeseries/([^/]+)"), "DELETE", ts_delete),
+    (re.compile(r"/api/ts/([^/]+)/timeseries/([^/]+)/values"), "GET", values),
+    (re.compile(r"/api/ts/([^/]+)/timeseries/([^/]+)/values"), "DELETE", values_delete),
+    (re.compile(r"/api/upload/([^/]+)/timeseries/([^/]+)/json"), "POST", upload),
+    (re.compile(r"/api/transfer/upload-url"), "GET", upload_url),
+    (re.compile(r"/api/conversion/transfer/upload-convert"), "POST", import_start),
+]
+
+
+def _format_rows(rows, data_fields):
+    if rows == 0:
+        return []
+    timestamps = np.datetime_as_string(START + STEP * np.arange(rows), unit="s")
+    values = np.random.default_rng(0).random((rows, data_fields + 1)).round(6)
+    columns = [timestamps] + [values[:, i].astype(str) for i in range(data_fields + 1)]
+    return ['["{0}",{1}]'.format(row[0], ",".join(row[1:])).encode("ascii") for row in zip(*columns)]
+
+
+def _body(rows):
+    return b'{"data":[' + b",".join(rows) + b"]}"
+
+
+def _position(timestamp, ceil):
+    # position of a timestamp in the one minute grid of generated values; accepts yyyy-mm-ddThhmmss
+    text = timestamp.replace(":", "")
+    stamp = np.datetime64("{0}:{1}:{2}".format(text[:13], text[13:15], text[15:17]), "s")
+    steps = (stamp - START) / STEP
+    return int(np.ceil(steps) if ceil else np.floor(steps))
@@ -0,0 +1,198 @@
+"""
+Benchmark suite of mikecloudio against the local fake service.
+
+Measures the throughput and peak Python memory of reading (get_data in its variants), writing (add_data) and
+listing for growing numbers of rows, stores the results as JSON and compares them with a baseline run.
+
+Example::
+
+    python benchmarks/run.py --sizes 1e3 1e4 1e5 1e6 --output benchmarks/results/current.json
+    python benchmarks/run.py --compare benchmarks/results/baseline.json --tolerance 0.25
+
+The fake service runs in a separate process, so that peak memory and timings only cover the client. Peak memory
+is measured with tracemalloc, which sees the allocations of Python objects and numpy arrays but not those of the
+network stack.
+"""
+import argparse
+import gc
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mikecloudio  # noqa: E402
+from benchmarks.fake_service import start_process  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+
+
+def measure(func, repeat=1):
+    """
+    run func repeat times and return the fastest run and the peak traced memory over all runs
+
+    :return: (seconds, peak bytes, result of the last run)
+    :rtype: tuple
+    """
+    best = float("inf")
+    peak = 0
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        best = min(best, seconds)
+    return best, peak, result
+
+
+def read_benchmarks(ts, rows):
+    end = pd.Timestamp("2000-01-01") + pd.Timedelta(minutes=rows - 1)
+    time_to = end.strftime("%Y-%m-%dT%H%M%S")
+    return {
+        "get_data": lambda: ts.get_data(),
+        "get_data[typed]": lambda: ts.get_data(typed=True),
+        "get_data[stream]": lambda: ts.get_data(stream=True),
+        "get_data[window=auto]": lambda: ts.get_data("2000-01-01T000000", time_to, window="auto", typed=True),
+    }
+
+
+def write_benchmarks(ts, rows, data_fields=0):
+    index = pd.date_range("2000-01-01", periods=rows, freq="min")
+    values = np.random.default_rng(1).random((rows, data_fields + 1))
+    df = pd.DataFrame(values, index=index, columns=["value"] + ["field{0}".format(i) for i in range(data_fields)])
+    return {
+        "add_data": lambda: ts.add_data(df),
+        "add_data[chunked]": lambda: ts.add_data(df, chunk_size=100000, max_workers=4, encode_workers=2),
+    }
+
+
+def setup_service(service, sizes, data_fields, listing_size):
+    """
+    add the timeseries read, written and listed by the benchmarks; runs in the process of the service
+    """
+    for rows in sizes:
+        service.add_timeseries("bench", "read-{0}".format(rows), rows=rows, data_fields=data_fields)
+        service.add_timeseries("bench", "write-{0}".format(rows), data_fields=data_fields)
+    for i in range(listing_size):
+        service.add_timeseries("listing", "ts-{0}".format(i))
+
+
+def run(sizes, latency=0.0, error_rate=0.0, repeat=1, listing_size=1000, data_fields=0):
+    """
+    run all benchmarks against a fresh fake service in a separate process
+
+    :return: list of result dictionaries
+    :rtype: list
+    """
+    url, process = start_process(setup_service, (sizes, data_fields, listing_size), latency=latency,
+                                 error_rate=error_rate)
+    results = []
+    try:
+        retry = mikecloudio.RetryPolicy(backoff_factor=0.01)
+        with mikecloudio.Connection("benchmark", project_id="p1", service_url=url,
+                                    retry_policy=retry, metadata_ttl=None) as con:
+            ds = con.get_ds(id="bench")
+            for rows in sizes:
+                benchmarks = read_benchmarks(ds.get_ts(id="read-{0}".format(rows)), rows)
+                benchmarks.update(write_benchmarks(ds.get_ts(id="write-{0}".format(rows)), rows, data_fields))
+                for name, func in benchmarks.items():
+                    seconds, peak, _ = measure(func, repeat)
+                    results.append(result(name, rows, seconds, peak))
+                    print("{0:<24} {1:>10} rows {2:>9.3f} s {3:>12.0f} rows/s {4:>9.1f} MB"
+                          .format(name, rows, seconds, rows / seconds, peak / 2 ** 20), flush=True)
+
+            listing = con.get_ds(id="listing", lazy=True)
+            seconds, peak, _ = measure(lambda: listing.ts_index(refresh=True), repeat)
+            results.append(result("list_ts", listing_size, seconds, peak))
+            print("{0:<24} {1:>10} ts   {2:>9.3f} s".format("list_ts", listing_size, seconds), flush=True)
+    finally:
+        process.terminate()
+        process.join()
+    return results
+
+
+def result(name, rows, seconds, peak):
+    return {"benchmark": name, "rows": rows, "seconds": seconds, "rows_per_second": rows / seconds,
+            "peak_memory_bytes": peak}
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip()
+    except OSError:
+        commit = None
+    return {"time": pd.Timestamp.now().isoformat(), "commit": commit, "python": platform.python_version(),
+            "pandas": pd.__version__, "numpy": np.__version__, "machine": platform.machine()}
+
+
+def compare(results, baseline, tolerance=0.2):
+    """
+    compare results with a baseline run
+
+    :return: descriptions of the benchmarks that got slower or use more memory than tolerance allows
+    :rtype: list
+    """
+    previous = {(r["benchmark"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get((r["benchmark"], r["rows"]))
+        if old is None:
+            continue
+        if r["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append("{0} ({1} rows): {2:.3f} s, baseline {3:.3f} s"
+                               .format(r["benchmark"], r["rows"], r["seconds"], old["seconds"]))
+        if r["peak_memory_bytes"] > old["peak_memory_bytes"] * (1 + tolerance):
+            regressions.append("{0} ({1} rows): {2:.1f} MB peak, baseline {3:.1f} MB"
+                               .format(r["benchmark"], r["rows"], r["peak_memory_bytes"] / 2 ** 20,
+                                       old["peak_memory_bytes"] / 2 ** 20))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", nargs="+", type=float, default=DEFAULT_SIZES,
+                        help="numbers of rows, e.g. 1e3 1e5 1e7")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds every response is delayed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--data-fields", type=int, default=0, help="number of data fields of every timeseries")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per benchmark, the fastest counts")
+    parser.add_argument("--listing-size", type=int, default=1000, help="number of timeseries listed")
+    parser.add_argument("--output", type=Path, help="file the results are written to")
+    parser.add_argument("--compare", type=Path, help="results of a baseline run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown or memory growth")
+    args = parser.parse_args(argv)
+
+    results = run([int(size) for size in args.sizes], args.latency, args.error_rate, args.repeat,
+                  args.listing_size, args.data_fields)
+    report = {"environment": environment(),
+              "settings": {"latency": args.latency, "error_rate": args.error_rate, "repeat": args.repeat,
+                           "data_fields": args.data_fields},
+              "results": results}
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.compare is not None:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.tolerance)
+        for regression in regressions:
+            print("regression: " + regression)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,9 @@
+from .aio import AsyncConnection, AsyncDataset, AsyncTimeseries, gather_limited
+from .appender import Appender
 from .dataset import Dataset
+from .exceptions import (AuthorizationError, CircuitOpenError, MikeCloudError, NotFoundError, RequestFailedError,
+                         ServiceUnavailableError, ThrottledError)
 from .request import Connection, Project
-from .timeseries import Timeseries
\ No newline at end of file
+from .store import LocalStore
+from .timeseries import Timeseries
+from .transport import CircuitBreaker, RateLimiter, RetryPolicy
\ No newline at end of file
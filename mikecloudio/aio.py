@@ -0,0 +1,649 @@
+import asyncio
+import copy
+import json
+import warnings
+from pathlib import Path
+
+import pandas as pd
+
+from mikecloudio.cache import NameIndex, TTLCache
+from mikecloudio.codec import check_columns, encode_values
+from mikecloudio.dataset import ts_body
+from mikecloudio.exceptions import ServiceUnavailableError
+from mikecloudio.request import dataset_body, dataset_update_body
+from mikecloudio.timeseries import name_columns, values_command
+from mikecloudio.transport import SERVICE_FAILURE_STATUSES, CircuitBreaker, RetryPolicy, validate_response
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+async def gather_limited(aws, limit=10, return_exceptions=False):
+    """
+    await coroutines concurrently with at most limit of them running at the same time
+
+    :param aws: coroutines or awaitables
+    :type aws: iterable
+    :param limit: maximum number of awaitables in flight
+    :type limit: int
+    :param return_exceptions: if True, exceptions are returned in the result list instead of raised
+    :type return_exceptions: bool
+    :return: results in the order of aws
+    :rtype: list
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+class AsyncResponse:
+
+    def __init__(self, status_code, headers, content):
+        """
+        Fully read response of an aiohttp request with the attributes used by validate_response.
+        """
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncTransport:
+
+    def __init__(self, limit=100, limit_per_host=0, timeout=60, keepalive_timeout=15, retry_policy=None,
+                 circuit_breaker=None):
+        """
+        Send HTTP requests over a shared aiohttp connection pool with the same retry and circuit breaker
+        behaviour as mikecloudio.transport.Transport. The session is created on first use inside the running loop.
+
+        :param limit: maximum number of simultaneous connections
+        :type limit: int
+        :param limit_per_host: maximum number of simultaneous connections per host; 0 means no limit
+        :type limit_per_host: int
+        :param timeout: total timeout of a request in seconds
+        :type timeout: float
+        :param keepalive_timeout: seconds an idle connection is kept alive
+        :type keepalive_timeout: float
+        :param retry_policy: retry policy; if None the default RetryPolicy is used
+        :type retry_policy: mikecloudio.transport.RetryPolicy
+        :param circuit_breaker: circuit breaker; if None the default CircuitBreaker is used
+        :type circuit_breaker: mikecloudio.transport.CircuitBreaker
+        """
+        if aiohttp is None:
+            raise ImportError("the asyncio client requires aiohttp: pip install aiohttp")
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker()
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host,
+                                             keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def send(self, method, url, idempotent=None, **kwargs):
+        """
+        send a request and read its body; see Transport.send
+
+        :return: response
+        :rtype: AsyncResponse
+        """
+        policy = self.retry_policy
+        if idempotent is None:
+            idempotent = policy.is_retryable(method)
+        retries = policy.max_retries if idempotent else 0
+
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            try:
+                async with self.session.request(method, url, **kwargs) as resp:
+                    response = AsyncResponse(resp.status, resp.headers, await resp.read())
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.circuit_breaker.record_failure()
+                if attempt >= retries:
+                    raise ServiceUnavailableError("Request failed: {0}".format(e)) from e
+                await asyncio.sleep(policy.backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.circuit_breaker.release_trial()
+                raise
+
+            if response.status_code in SERVICE_FAILURE_STATUSES:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+
+            if response.status_code not in policy.retry_statuses or attempt >= retries:
+                return response
+            await asyncio.sleep(policy.backoff(attempt, response))
+            attempt += 1
+
+    async def get(self, url, **kwargs):
+        return await self.send("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.send("POST", url, **kwargs)
+
+    async def put(self, url, **kwargs):
+        return await self.send("PUT", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.send("DELETE", url, **kwargs)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncConnection:
+
+    def __init__(self, api_key, project_name=None, project_id=None,
+                 service_url="https://core-metadata-prod.azurewebsites.net/", limit=100, limit_per_host=0,
+                 timeout=60, retry_policy=None, circuit_breaker=None, metadata_ttl=300):
+        """
+        asyncio counterpart of mikecloudio.Connection. All AsyncDataset and AsyncTimeseries objects created from it
+        share one aiohttp connection pool. Use it as an async context manager, which resolves the project and closes
+        the pool on exit:
+
+            async with AsyncConnection(api_key, project_name="my project") as con:
+                ds = await con.get_ds(name="my dataset")
+
+        :param api_key: api key that gives access to desired projects
+        :type api_key: str
+        :param project_name: name of the project
+        :type project_name: str
+        :param project_id: project ID
+        :type project_id: str
+        :param service_url: metadata service url
+        :type service_url: str
+        :param limit: maximum number of simultaneous connections
+        :type limit: int
+        :param limit_per_host: maximum number of simultaneous connections per host; 0 means no limit
+        :type limit_per_host: int
+        :param timeout: total timeout of a request in seconds
+        :type timeout: float
+        :param retry_policy: retry and backoff policy; if None the default RetryPolicy is used
+        :type retry_policy: mikecloudio.transport.RetryPolicy
+        :param circuit_breaker: circuit breaker; if None the default CircuitBreaker is used
+        :type circuit_breaker: mikecloudio.transport.CircuitBreaker
+        :param metadata_ttl: seconds timeseries metadata stays cached; see Connection
+        :type metadata_ttl: float
+        """
+        if project_id is None and project_name is None:
+            raise Exception("Please specify either project_id or project_name.")
+        self.url = service_url
+        self._api_key = api_key
+        self.project_id = project_id
+        self.project_name = project_name
+        self._header = {'dhi-open-api-key': api_key}
+        self.metadata_cache = TTLCache(ttl=metadata_ttl)
+        self.transport = AsyncTransport(limit=limit, limit_per_host=limit_per_host, timeout=timeout,
+                                        retry_policy=retry_policy, circuit_breaker=circuit_breaker)
+
+    async def __aenter__(self):
+        await self.validate_project()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        await self.transport.close()
+
+    async def validate_project(self):
+        if self.project_id is None or self.project_name is None:
+            projects = await self.request_projects()
+            if self.project_id is None:
+                match = projects['id'].loc[projects['name'] == self.project_name]
+                if len(match) == 0:
+                    raise Exception(f"Invalid {self.project_name}")
+                self.project_id = match.values[0]
+            else:
+                match = projects['name'].loc[projects['id'] == self.project_id]
+                if len(match) == 0:
+                    raise Exception(f"Invalid {self.project_id}")
+                self.project_name = match.values[0]
+
+    async def request(self, command, json_key="data"):
+        response = await self.transport.get(self.url + command, headers=self._header)
+        validate_response(response)
+        if json_key is None:
+            return response.json()
+
+        return response.json()[json_key]
+
+    async def request_projects(self):
+        return pd.DataFrame(await self.request("api/project/list"))
+
+    async def request_subprojects(self, project_id=None):
+        if project_id is None:
+            project_id = self.project_id
+
+        return pd.DataFrame(await self.request(f"api/project/{project_id}/subprojects"))
+
+    async def request_datasets(self, project_id=None, extend=False):
+        if project_id is None:
+            project_id = self.project_id
+
+        command = f"api/project/{project_id}/dataset/list"
+        if extend:
+            command += "-summaries"
+
+        return pd.DataFrame(await self.request(command))
+
+    async def query_ds_id(self, name, project_id=None):
+        df = await self.request_datasets(project_id)
+        match = df["id"].loc[df["name"] == name] if not df.empty else []
+        if len(match) == 0:
+            raise ValueError("dataset of name {0} does not exist".format(name))
+
+        return match.values[0]
+
+    async def query_ds_name(self, id, project_id=None):
+        df = await self.request_datasets(project_id)
+        match = df["name"].loc[df["id"] == id] if not df.empty else []
+        if len(match) == 0:
+            raise ValueError("dataset of id {0} does not exist".format(id))
+
+        return match.values[0]
+
+    async def get_ds(self, name="", id=""):
+        """
+        create an AsyncDataset by name or id
+
+        :return: AsyncDataset instance
+        :rtype: AsyncDataset
+        """
+        if id == "" and name == "":
+            raise ValueError("id of dataset was not defined or does not exist")
+        if id == "":
+            id = await self.query_ds_id(name)
+        elif name == "":
+            name = await self.query_ds_name(id)
+
+        return AsyncDataset(self, id, name)
+
+    async def create_ds(self, name, descr, prop_ds=None, metadata_ds=None, prop_ts=None,
+                        content_type="application/json"):
+        """
+        create a dataset; see Connection.create_ds
+
+        :return: AsyncDataset of the created dataset
+        :rtype: AsyncDataset
+        """
+        body = dataset_body(name, descr, prop_ds, metadata_ds, prop_ts)
+        header = {'dhi-open-api-key': '{0}'.format(self._api_key), 'Content-Type': '{0}'.format(content_type),
+                  'dhi-project-id': '{0}'.format(self.project_id), 'dhi-service-id': "timeseries"}
+        response = await self.transport.post(self.url + "api/ts/dataset", headers=header, data=body)
+        validate_response(response, "request failed")
+        return AsyncDataset(self, response.json()["id"], name)
+
+    async def update_ds(self, dataset_id, name_update, descr_update, type_ds="file", temp_info=None,
+                        spat_info=None, add_prop=None, metadata=None):
+        """
+        update a dataset; see Connection.update_ds
+
+        :return: response of the service
+        :rtype: dict
+        """
+        url = self.url + "api/project/{0}/dataset".format(self.project_id)
+        body = dataset_update_body(dataset_id, name_update, descr_update, type_ds, temp_info, spat_info, add_prop,
+                                   metadata)
+        response = await self.transport.put(url, headers=self._header, data=body)
+        validate_response(response, "request failed")
+        return response.json()
+
+    async def del_ds(self, name="", id="", confirm=False):
+        """
+        delete a dataset by name or id. Unlike Connection.del_ds, nothing is asked on the console:
+        the dataset is only deleted if confirm is True.
+
+        :param confirm: True deletes, False does nothing
+        :type confirm: bool
+        """
+        if id == "" and name == "":
+            raise ValueError("id of dataset was not defined or does not exist")
+        if id == "":
+            id = await self.query_ds_id(name)
+        if confirm is True:
+            await self._delete_ds(id)
+
+    async def _delete_ds(self, id):
+        url = self.url + "api/project/{0}/dataset/{1}".format(self.project_id, id)
+        response = await self.transport.delete(url, headers=self._header)
+        validate_response(response, "deletion request failed")
+        self.metadata_cache.invalidate_prefix(("ts", id))
+
+
+class AsyncDataset:
+
+    def __init__(self, connection, id_dataset, name_dataset=""):
+        """
+        asyncio counterpart of mikecloudio.Dataset; usually created with AsyncConnection.get_ds()
+        """
+        self.con = connection
+        self._id = id_dataset
+        self._name = name_dataset
+        self._header = {'dhi-open-api-key': connection._api_key,
+                        'Content-Type': 'application/json',
+                        'dhi-project-id': '{0}'.format(connection.project_id),
+                        'dhi-dataset-id': '{0}'.format(id_dataset),
+                        'dhi-service-id': 'timeseries',
+                        }
+
+    def get_id(self):
+        return self._id
+
+    async def get_info(self, extended=False):
+        if extended is True:
+            url = self.con.url + "api/ts/{0}".format(self._id)
+        else:
+            url = self.con.url + "api/project/{0}/dataset/{1}".format(self.con.project_id, self._id)
+        response = await self.con.transport.get(url, headers=self._header)
+        validate_response(response, "request failed")
+        return response.json()
+
+    async def list_ts(self):
+        resp_dict, _ = await self._request_ts_list()
+        return pd.DataFrame(resp_dict)
+
+    async def _request_ts_list(self):
+        url = self.con.url + "api/ts/{0}/timeseries/list".format(self._id)
+        response = await self.con.transport.get(url, headers=self._header)
+        validate_response(response, "request failed")
+        resp_dict = response.json()["data"]
+        for info in resp_dict:
+            if "id" in info and "item" in info and "dataFields" in info:
+                self.con.metadata_cache.set(("ts", self._id, info["id"]), info)
+        index = NameIndex(resp_dict, name_of=lambda info: info["item"]["name"])
+        self.con.metadata_cache.set(("ts-index", self._id), index)
+        return resp_dict, index
+
+    async def ts_index(self, refresh=False):
+        """
+        index of all timeseries in the dataset by id and by name; see Dataset.ts_index
+
+        :rtype: mikecloudio.cache.NameIndex
+        """
+        index = None if refresh else self.con.metadata_cache.get(("ts-index", self._id))
+        if index is None:
+            _, index = await self._request_ts_list()
+        return index
+
+    def invalidate_ts_index(self):
+        self.con.metadata_cache.invalidate(("ts-index", self._id))
+
+    async def _lookup_ts(self, found):
+        # a cached index that misses may be outdated, so it is rebuilt once before giving up
+        index = self.con.metadata_cache.get(("ts-index", self._id))
+        if index is None or not found(index):
+            index = await self.ts_index(refresh=True)
+        return index
+
+    async def query_ts_id(self, name):
+        """
+        id of the timeseries of a name; the last one listed if several share it, see Dataset.query_ts_id
+        """
+        index = await self._lookup_ts(lambda index: index.has_name(name))
+        return _resolve_name(index, name)
+
+    async def query_ts_name(self, id):
+        index = await self._lookup_ts(lambda index: id in index)
+        if id not in index:
+            raise ValueError("timeseries with id {0} does not exist".format(id))
+        return index.name(id)
+
+    async def check_ts_exist(self, name):
+        index = await self._lookup_ts(lambda index: index.has_name(name))
+        return index.has_name(name)
+
+    async def get_ts(self, name="", id=""):
+        """
+        create an AsyncTimeseries by name or id
+
+        :return: AsyncTimeseries instance
+        :rtype: AsyncTimeseries
+        """
+        if id == "" and name == "":
+            raise ValueError("id of timeseries was not defined or does not exist")
+        if id == "":
+            id = await self.query_ts_id(name)
+        elif name == "":
+            name = await self.query_ts_name(id)
+
+        return AsyncTimeseries(self, id, name)
+
+    async def get_many_ts(self, names=None, ids=None):
+        """
+        create AsyncTimeseries objects for several names or ids, all resolved from a single listing
+
+        :param names: timeseries names
+        :type names: list
+        :param ids: timeseries ids
+        :type ids: list
+        :return: list of AsyncTimeseries, first those of names, then those of ids, each in the given order
+        :rtype: list
+        """
+        names = list(names or [])
+        ids = list(ids or [])
+        index = await self._lookup_ts(lambda index: all(index.has_name(name) for name in names)
+                                      and all(id in index for id in ids))
+
+        handles = [AsyncTimeseries(self, _resolve_name(index, name), name) for name in names]
+        for id in ids:
+            if id not in index:
+                raise ValueError("timeseries with id {0} does not exist".format(id))
+            handles.append(AsyncTimeseries(self, id, index.name(id)))
+        return handles
+
+    async def create_ts(self, name, unit="eumUmeter", item="eumIWaterLevel", data_type="Single", data_fields=None,
+                        properties=None):
+        """
+        create a timeseries; see Dataset.create_ts
+
+        :return: AsyncTimeseries of the created timeseries
+        :rtype: AsyncTimeseries
+        """
+        spec = {"name": name, "unit": unit, "item": item, "data_type": data_type, "data_fields": data_fields,
+                "properties": properties}
+        property_names = None
+        if properties:
+            info = await self.get_info(extended=True)
+            property_names = {prop["name"] for prop in info["timeSeriesProperties"]}
+        body = ts_body(spec, property_names)
+
+        url = self.con.url + "api/ts/{0}/timeseries".format(self._id)
+        response = await self.con.transport.post(url, headers=self._header, data=json.dumps(body))
+        validate_response(response, "request failed")
+        self.invalidate_ts_index()
+        return AsyncTimeseries(self, response.json()["id"], name)
+
+    async def update_properties(self, properties, name="", id=""):
+        """
+        update the properties of a timeseries; see Dataset.update_properties
+
+        :return: response of the service
+        :rtype: dict
+        """
+        if name != "" and id == "":
+            id = await self.query_ts_id(name)
+
+        url = self.con.url + "api/ts/{0}/{1}".format(self._id, id)
+        response = await self.con.transport.put(url, headers=self._header, data=json.dumps({"properties": properties}))
+        validate_response(response, "request failed")
+        self.con.metadata_cache.invalidate(("ts", self._id, id))
+        self.invalidate_ts_index()
+        return response.json()
+
+    async def del_ts(self, name="", id="", confirm=False):
+        """
+        delete a timeseries by name or id; nothing is asked on the console, it is only deleted if confirm is True
+
+        :param confirm: True deletes, False does nothing
+        :type confirm: bool
+        """
+        if name != "" and id == "":
+            id = await self.query_ts_id(name)
+        if confirm is True:
+            await AsyncTimeseries(self, id, name)._delete()
+
+    async def del_ds(self, confirm=False):
+        """
+        delete this dataset; nothing is asked on the console, it is only deleted if confirm is True
+
+        :param confirm: True deletes, False does nothing
+        :type confirm: bool
+        """
+        if confirm is True:
+            await self.con._delete_ds(self._id)
+
+
+def _resolve_name(index, name):
+    # same rule as Dataset.query_ts_id: the last listed timeseries of a name, with a warning if it is not unique
+    ids = index.ids(name)
+    if not ids:
+        raise ValueError("timeseries of name {0} does not exist".format(name))
+    if len(ids) >= 2:
+        warnings.warn("Warning: {0} timeseries with name '{1}' exist. Choose by ID to avoid errors"
+                      .format(len(ids), name))
+    return ids[-1]
+
+
+class AsyncTimeseries:
+
+    def __init__(self, dataset, id_timeseries, name_timeseries=""):
+        """
+        asyncio counterpart of mikecloudio.Timeseries; usually created with AsyncDataset.get_ts()
+        """
+        self.ds = dataset
+        self._id_ds = dataset._id
+        self._id = id_timeseries
+        self._name = name_timeseries
+        self._header = dataset._header
+
+    async def get_info(self, refresh=False):
+        key = ("ts", self._id_ds, self._id)
+        info = None if refresh else self.ds.con.metadata_cache.get(key)
+        if info is None:
+            url = self.ds.con.url + "api/ts/{0}/timeseries/{1}".format(self._id_ds, self._id)
+            response = await self.ds.con.transport.get(url, headers=self._header)
+            validate_response(response, "GET request failed")
+            info = response.json()
+            self.ds.con.metadata_cache.set(key, info)
+        # a copy, so that changes of the caller do not end up in the cache
+        return copy.deepcopy(info)
+
+    async def get_data(self, time_from=None, time_to=None):
+        """
+        request data in timeseries; see Timeseries.get_data
+
+        :return: dataframe containing the timeseries data
+        :rtype: pd.DataFrame
+        """
+        url = self.ds.con.url + values_command(self._id_ds, self._id, time_from, time_to)
+        response, info = await asyncio.gather(self.ds.con.transport.get(url, headers=self._header),
+                                              self.get_info())
+        validate_response(response, "request failed - validate that times are given in format {yyyy-MM-ddTHHmmss}")
+        df = pd.DataFrame(response.json()["data"])
+        name_columns(df, info)
+        return df
+
+    async def add_data(self, dataframe, columns=None):
+        """
+        add data in form of a dataframe with timestamp index; see Timeseries.add_data
+        """
+        if 0 in dataframe.index:
+            raise ValueError("dataframe index must be set to timestamp")
+
+        info = await self.get_info()
+        await self._post_values(encode_values(dataframe, info["dataFields"], columns))
+
+    async def add_csv(self, path, columns=None, chunk_size=100000, limit=4):
+        """
+        add data in form of a csv-file, read and uploaded in chunks of chunk_size rows; see Timeseries.add_csv
+
+        :param limit: maximum number of chunks uploaded at the same time
+        :type limit: int
+        :return: number of rows sent
+        :rtype: int
+        """
+        path = Path(path)
+        info = await self.get_info()
+        names = list(columns) if columns else list(pd.read_csv(path, index_col=0, nrows=0).columns)
+        check_columns(names, info["dataFields"])
+
+        sent = 0
+        pending = set()
+        try:
+            for chunk in pd.read_csv(path, index_col=0, chunksize=chunk_size):
+                if len(pending) >= limit:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        task.result()
+                body = encode_values(chunk[names], info["dataFields"], check=False)
+                pending.add(asyncio.ensure_future(self._post_values(body)))
+                sent += len(chunk)
+            await asyncio.gather(*pending)
+        finally:
+            for task in pending:
+                task.cancel()
+        return sent
+
+    async def _post_values(self, body):
+        url = self.ds.con.url + "api/upload/{0}/timeseries/{1}/json".format(self._id_ds, self._id)
+        # uploading the same values again overwrites them, so the request is safe to retry
+        response = await self.ds.con.transport.post(url, headers=self._header, data=body, idempotent=True)
+        validate_response(response, "failed POST request.")
+
+    async def del_ts(self, confirm=False):
+        """
+        delete this timeseries; nothing is asked on the console, it is only deleted if confirm is True
+
+        :param confirm: True deletes, False does nothing
+        :type confirm: bool
+        """
+        if confirm is True:
+            await self._delete()
+
+    async def _delete(self):
+        url = self.ds.con.url + "api/ts/{0}/timeseries/{1}".format(self._id_ds, self._id)
+        response = await self.ds.con.transport.delete(url, headers=self._header)
+        validate_response(response, "deletion request failed")
+        self.ds.con.metadata_cache.invalidate(("ts", self._id_ds, self._id))
+        self.ds.invalidate_ts_index()
+
+    async def del_data(self, time_from=None, time_to=None, confirm=False):
+        """
+        delete data between time_from and time_to; see Timeseries.del_data. Nothing is asked on the console,
+        the data is only deleted if confirm is True.
+
+        :param confirm: True deletes, False does nothing
+        :type confirm: bool
+        """
+        if confirm is not True:
+            return
+        url = self.ds.con.url + values_command(self._id_ds, self._id, time_from, time_to)
+        response = await self.ds.con.transport.delete(url, headers=self._header)
+        validate_response(response, "request failed. make sure times are in format {yyyy-MM-ddTHHmmss}")
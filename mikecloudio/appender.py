@@ -0,0 +1,206 @@
+import atexit
+import threading
+import time
+import warnings
+
+import pandas as pd
+
+from mikecloudio.codec import check_columns, dumps, values_to_rows
+from mikecloudio.transport import map_concurrent
+
+
+class Appender:
+
+    def __init__(self, max_rows=1000, max_age=5.0, max_workers=4, max_buffered_rows=1000000, on_error=None):
+        """
+        Write-behind buffer for appending small amounts of data to many timeseries.
+        Appended rows are collected in memory per timeseries and uploaded by a background thread once a timeseries
+        holds max_rows rows or its oldest row is max_age seconds old, on flush(), on close() and at interpreter exit.
+        Rows of a failed upload are kept and sent with the next flush.
+
+        :param max_rows: number of buffered rows of a timeseries that triggers its upload
+        :type max_rows: int
+        :param max_age: seconds after which buffered rows are uploaded at the latest; if None, rows are only\
+            uploaded when max_rows is reached and on flush() and close()
+        :type max_age: float
+        :param max_workers: maximum number of timeseries uploaded at the same time
+        :type max_workers: int
+        :param max_buffered_rows: maximum number of rows kept per timeseries while uploads fail;
+            the oldest rows are dropped beyond it
+        :type max_buffered_rows: int
+        :param on_error: called as on_error(timeseries, exception) when an upload fails;
+            if None a warning is issued
+        :type on_error: callable
+        """
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be positive or None")
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self.max_buffered_rows = max_buffered_rows
+        self.on_error = on_error
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="mikecloudio-appender", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def append(self, timeseries, data, *values):
+        """
+        buffer data for a timeseries
+
+        :param timeseries: timeseries to append to
+        :type timeseries: mikecloudio.Timeseries
+        :param data: dataframe with timestamp index and columns in dataFields order, or the timestamp of a single row
+        :type data: pd.DataFrame or str or datetime
+        :param values: values of a single row: main value, then data fields
+        :raises ValueError: if the columns do not fit the dataFields
+        :raises TypeError: if a value cannot be serialized to JSON
+        """
+        if self._closed:
+            raise ValueError("appender is closed")
+
+        fields = timeseries.get_info()["dataFields"]
+        if isinstance(data, pd.DataFrame):
+            rows = values_to_rows(data, fields)
+        else:
+            check_columns([None] + [field["name"] for field in fields][:len(values) - 1], fields)
+            # a one-row frame converts numpy scalars, timestamps and NaN like the columns of a dataframe
+            row = pd.DataFrame([values], index=pd.DatetimeIndex([pd.Timestamp(data)]))
+            rows = values_to_rows(row, fields, check=False)
+        # fail here rather than at every flush of the buffer
+        dumps(rows)
+
+        with self._lock:
+            key = (timeseries._id_ds, timeseries.id)
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                buffer = self._buffers[key] = _Buffer(timeseries)
+            if not buffer.rows:
+                # max_age counts from the oldest row waiting for upload
+                buffer.since = time.monotonic()
+            buffer.rows.extend(rows)
+            full = len(buffer.rows) >= self.max_rows
+        if full:
+            self._wakeup.set()
+
+    def flush(self, timeseries=None):
+        """
+        upload the buffered rows now
+
+        :param timeseries: only upload the rows of this timeseries; if None, rows of all timeseries are uploaded
+        :type timeseries: mikecloudio.Timeseries
+        """
+        self._flush(lambda key, buffer: timeseries is None or key == (timeseries._id_ds, timeseries.id))
+
+    def close(self):
+        """
+        upload all buffered rows and stop the background thread
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(buffer.rows) for buffer in self._buffers.values())
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(timeout=1.0 if self.max_age is None else min(1.0, self.max_age))
+            self._wakeup.clear()
+            if self._closed:
+                return
+            now = time.monotonic()
+            self._flush(lambda key, buffer: len(buffer.rows) >= self.max_rows
+                        or (self.max_age is not None and now - buffer.since >= self.max_age))
+
+    def _flush(self, select):
+        with self._flush_lock:
+            with self._lock:
+                batches = []
+                for key, buffer in self._buffers.items():
+                    if buffer.rows and select(key, buffer):
+                        batches.append((buffer, buffer.rows))
+                        buffer.rows = []
+
+            map_concurrent(self._send, batches, self.max_workers)
+
+    def _send(self, batch):
+        buffer, rows = batch
+        try:
+            body = dumps({"data": rows})
+        except (TypeError, ValueError) as e:
+            # sending the rows again would fail the same way, so they are dropped
+            self._report(buffer, e, "appending {0} rows to timeseries {1} failed, the rows are dropped: {2}"
+                         .format(len(rows), buffer.timeseries.id, e))
+            return
+        try:
+            buffer.timeseries._post_values(body)
+        except Exception as e:
+            with self._lock:
+                if not buffer.rows:
+                    buffer.since = time.monotonic()
+                buffer.rows[:0] = rows
+                if len(buffer.rows) > self.max_buffered_rows:
+                    del buffer.rows[:len(buffer.rows) - self.max_buffered_rows]
+            self._report(buffer, e, "appending {0} rows to timeseries {1} failed, retrying with the next flush: {2}"
+                         .format(len(rows), buffer.timeseries.id, e))
+        finally:
+            # even a failed upload may have written some of the rows
+            buffer.timeseries._forget_stored(*_time_range(rows))
+
+    def _report(self, buffer, error, message):
+        if self.on_error is not None:
+            self.on_error(buffer.timeseries, error)
+        else:
+            warnings.warn(message)
+
+
+class AppenderHandle:
+
+    def __init__(self, appender, timeseries):
+        """
+        Appender bound to a single timeseries, as returned by Timeseries.appender().
+        """
+        self.appender = appender
+        self.timeseries = timeseries
+
+    def append(self, data, *values):
+        """
+        buffer a dataframe with timestamp index, or a single row given as timestamp, main value, data fields...
+        """
+        self.appender.append(self.timeseries, data, *values)
+
+    def flush(self):
+        self.appender.flush(self.timeseries)
+
+
+class _Buffer:
+
+    def __init__(self, timeseries):
+        self.timeseries = timeseries
+        self.rows = []
+        self.since = time.monotonic()
+
+
+def _time_range(rows):
+    # first and last timestamp of buffered rows; (None, None) covers everything if they cannot be compared
+    try:
+        timestamps = pd.to_datetime([row[0] for row in rows], format="ISO8601")
+    except (TypeError, ValueError):
+        return None, None
+    return timestamps.min(), timestamps.max()
@@ -0,0 +1,105 @@
+import threading
+import time
+
+
+class TTLCache:
+
+    def __init__(self, ttl=300.0):
+        """
+        Thread-safe in-memory cache whose entries expire ttl seconds after they were set.
+
+        :param ttl: time to live of an entry in seconds; None keeps entries until invalidated, 0 disables caching
+        :type ttl: float
+        """
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        return the value stored for key or default if it is missing or expired
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        if self.ttl == 0:
+            return
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (value, expires)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def invalidate_prefix(self, prefix):
+        """
+        remove all entries whose tuple key starts with prefix
+        """
+        n = len(prefix)
+        with self._lock:
+            for key in [k for k in self._data if isinstance(k, tuple) and k[:n] == prefix]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key):
+        return self.get(key, self) is not self
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class NameIndex:
+
+    def __init__(self, records, name_of=None):
+        """
+        Hash index of listing records by id and by name. Names do not have to be unique; every name maps to the ids
+        of all records carrying it, in listing order.
+
+        :param records: records of a listing, each a dict with an "id" key
+        :type records: list
+        :param name_of: function returning the name of a record; defaults to record["name"]
+        :type name_of: callable
+        """
+        if name_of is None:
+            name_of = lambda record: record["name"]
+        self.records = {}
+        self.names = {}
+        self.ids_by_name = {}
+        for record in records:
+            id = record["id"]
+            name = name_of(record)
+            self.records[id] = record
+            self.names[id] = name
+            self.ids_by_name.setdefault(name, []).append(id)
+
+    def ids(self, name):
+        """
+        :return: ids of all records with the given name; empty if there is none
+        :rtype: list
+        """
+        return self.ids_by_name.get(name, [])
+
+    def name(self, id, default=None):
+        return self.names.get(id, default)
+
+    def has_name(self, name):
+        return name in self.ids_by_name
+
+    def __contains__(self, id):
+        return id in self.records
+
+    def __len__(self):
+        return len(self.records)
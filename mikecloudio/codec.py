@@ -0,0 +1,358 @@
+import codecs
+import json
+import re
+import warnings
+from itertools import zip_longest
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# dtypes of the item and dataFields dataTypes of a timeseries; types not listed are kept as python objects
+DTYPES = {
+    "Single": np.float32,
+    "Double": np.float64,
+    "Int16": "Int16",
+    "Int32": "Int32",
+    "Int64": "Int64",
+    "Flag": "category",
+    "DateTime": "datetime64[ns]",
+    "Date": "datetime64[ns]",
+    "Text": object,
+}
+
+_DATA_START = re.compile(r'"data"\s*:\s*\[')
+_ROW_SEPARATOR = re.compile(r'\s*,\s*\[')
+
+
+def value_columns(info):
+    """
+    names and dataTypes of the value columns of a timeseries: main item first, then the dataFields
+
+    :param info: timeseries details as returned by Timeseries.get_info()
+    :type info: dict
+    :return: list of (name, dataType) tuples
+    :rtype: list
+    """
+    columns = [(info["item"]["item"], info["item"].get("dataType"))]
+    columns += [(field["name"], field.get("dataType")) for field in info.get("dataFields", [])]
+    return columns
+
+
+def to_array(values, data_type):
+    """
+    convert the values of one column into a typed array
+
+    :param values: sequence of values as decoded from JSON
+    :param data_type: dataType of the column, e.g. "Single"
+    :type data_type: str
+    :return: typed array
+    :rtype: np.ndarray or pd.api.extensions.ExtensionArray
+    """
+    dtype = DTYPES.get(data_type, object)
+    if dtype == "category":
+        return pd.Categorical(values)
+    if dtype == "datetime64[ns]":
+        return pd.to_datetime(values, format="ISO8601").as_unit("ns").values
+    if isinstance(dtype, str):
+        return pd.array(values, dtype=dtype)
+    if dtype is object:
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+    return np.array(values, dtype=dtype)
+
+
+def decode_values(rows, info):
+    """
+    decode the rows of a values response into a dataframe with typed columns.
+    The timestamps form a nanosecond DatetimeIndex named "timestamp"; every value column gets the dtype of its dataType,
+    e.g. float32 for Single, float64 for Double and categorical for Flag.
+
+    :param rows: the "data" list of a values response, rows of [timestamp, main value, data fields...]
+    :type rows: list
+    :param info: timeseries details as returned by Timeseries.get_info()
+    :type info: dict
+    :return: typed dataframe with timestamp index
+    :rtype: pd.DataFrame
+    """
+    columns = value_columns(info)
+    transposed = list(zip_longest(*rows)) if rows else [() for _ in range(len(columns) + 1)]
+
+    index = pd.DatetimeIndex(pd.to_datetime(list(transposed[0]), format="ISO8601"), name="timestamp").as_unit("ns")
+    data = {}
+    for (name, data_type), values in zip(columns, transposed[1:]):
+        data[name] = to_array(list(values), data_type)
+
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+class ColumnBuffer:
+
+    def __init__(self, dtype, capacity=1024):
+        """
+        Growable one-dimensional buffer that appends values into a preallocated array, doubling its size when full.
+
+        :param dtype: numpy dtype of the values
+        :param capacity: initial number of values
+        :type capacity: int
+        """
+        self._array = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._array.dtype)
+        end = self._size + len(values)
+        if end > len(self._array):
+            grown = np.empty(max(end, 2 * len(self._array)), dtype=self._array.dtype)
+            grown[:self._size] = self._array[:self._size]
+            self._array = grown
+        self._array[self._size:end] = values
+        self._size = end
+
+    def __len__(self):
+        return self._size
+
+    def to_array(self):
+        """
+        :return: the appended values, without the unused capacity
+        :rtype: np.ndarray
+        """
+        if self._size == len(self._array):
+            return self._array
+        return self._array[:self._size].copy()
+
+
+def iter_row_batches(chunks, batch_bytes=1 << 20):
+    """
+    incrementally parse the "data" array of a values response while it is received.
+    Rows are cut from the received text at row boundaries once at least batch_bytes are buffered and decoded
+    with json in one call per batch, so the complete response text and row lists are never held at once.
+
+    :param chunks: the response body in byte chunks, e.g. response.iter_content(65536)
+    :type chunks: iterable
+    :param batch_bytes: minimum size of the text decoded at once
+    :type batch_bytes: int
+    :return: generator of lists of rows
+    :rtype: generator
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    in_data = False
+    for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        if not in_data:
+            match = _DATA_START.search(buffer)
+            if match is None:
+                continue
+            buffer = buffer[match.end():]
+            in_data = True
+        if len(buffer) < batch_bytes:
+            continue
+
+        rows, buffer = _cut_rows(buffer)
+        if rows:
+            yield rows
+
+    buffer += decoder.decode(b"", final=True)
+    if not in_data:
+        match = _DATA_START.search(buffer)
+        if match is None:
+            raise ValueError("response does not contain a data array")
+        buffer = buffer[match.end():]
+
+    # the remaining text ends the data array; it is closed by the last "]" that leaves valid rows before it
+    end = len(buffer)
+    while True:
+        end = buffer.rfind("]", 0, end)
+        if end < 0:
+            raise ValueError("response ended before the data array was closed")
+        try:
+            rows = json.loads("[" + buffer[:end] + "]")
+        except ValueError:
+            continue
+        if rows:
+            yield rows
+        return
+
+
+def _cut_rows(buffer):
+    # split the buffer after the last complete row; a candidate boundary inside a string fails to decode
+    end = len(buffer)
+    while True:
+        end = buffer.rfind("]", 0, end)
+        if end < 0:
+            return [], buffer
+        separator = _ROW_SEPARATOR.match(buffer, end + 1)
+        if separator is None:
+            continue
+        try:
+            rows = json.loads("[" + buffer[:end + 1] + "]")
+        except ValueError:
+            continue
+        return rows, buffer[separator.end() - 1:]
+
+
+def decode_stream(chunks, info, batch_bytes=1 << 20):
+    """
+    decode a values response while it is received into a typed dataframe as returned by decode_values().
+    Every batch of rows is appended to growable typed column buffers, so peak memory stays close to the size
+    of the final arrays.
+
+    :param chunks: the response body in byte chunks, e.g. response.iter_content(65536)
+    :type chunks: iterable
+    :param info: timeseries details as returned by Timeseries.get_info()
+    :type info: dict
+    :param batch_bytes: minimum size of the text decoded at once
+    :type batch_bytes: int
+    :return: typed dataframe with timestamp index
+    :rtype: pd.DataFrame
+    """
+    columns = value_columns(info)
+    timestamps = ColumnBuffer("datetime64[ns]")
+    buffers = []
+    for name, data_type in columns:
+        dtype = DTYPES.get(data_type, object)
+        buffers.append(ColumnBuffer(dtype if dtype in (np.float32, np.float64) else object))
+
+    tz = None
+    for rows in iter_row_batches(chunks, batch_bytes):
+        transposed = list(zip_longest(*rows))
+        stamps = pd.to_datetime(list(transposed[0]), format="ISO8601").as_unit("ns")
+        if stamps.tz is not None:
+            tz = stamps.tz
+            stamps = stamps.tz_convert(None)
+        timestamps.extend(stamps.values)
+        for buffer, values in zip_longest(buffers, transposed[1:len(buffers) + 1], fillvalue=()):
+            if len(values) == 0:
+                values = [None] * len(rows)
+            buffer.extend(values)
+
+    index = pd.DatetimeIndex(timestamps.to_array(), name="timestamp")
+    if tz is not None:
+        index = index.tz_localize("UTC").tz_convert(tz)
+    data = {}
+    for (name, data_type), buffer in zip(columns, buffers):
+        array = buffer.to_array()
+        if array.dtype == object and DTYPES.get(data_type, object) is not object:
+            array = to_array(array, data_type)
+        data[name] = array
+
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def dumps(obj):
+    """
+    serialize obj to JSON bytes, using orjson if it is installed and the json module otherwise
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def format_timestamps(index):
+    """
+    format a timestamp index as strings in one vectorized pass.
+    Datetime indexes are written in ISO 8601, timezone aware ones converted to UTC with a "Z" suffix;
+    any other index is converted with str.
+
+    :param index: index of the dataframe to upload
+    :type index: pd.Index
+    :return: list of timestamp strings
+    :rtype: list
+    """
+    if isinstance(index, pd.DatetimeIndex):
+        if index.hasnans:
+            raise ValueError("Timestamps must not be missing (NaT).")
+        return _format_datetimes(index).tolist()
+    return index.astype(str).tolist()
+
+
+def _format_datetimes(index):
+    # ISO 8601 strings of a DatetimeIndex; missing timestamps become "NaT"
+    timezone = "naive"
+    if index.tz is not None:
+        index = index.tz_convert("UTC").tz_localize(None)
+        timezone = "UTC"
+    values = index.as_unit("ns").values
+    ns = values[~np.isnat(values)].view(np.int64)
+    # the coarsest unit that keeps every timestamp exact, the same for all rows
+    unit = "ns"
+    for candidate, factor in (("s", 10 ** 9), ("ms", 10 ** 6), ("us", 10 ** 3)):
+        if not (ns % factor).any():
+            unit = candidate
+            break
+    return np.datetime_as_string(values, unit=unit, timezone=timezone)
+
+
+def check_columns(names, data_fields):
+    """
+    check once that the upload columns fit the dataFields of the timeseries
+
+    :param names: names of the upload columns, 1st: main value, 2-nth: dataFields order
+    :type names: list
+    :param data_fields: dataFields defined in the timeseries
+    :type data_fields: list
+    """
+    if len(names) - 1 != len(data_fields):
+        raise ValueError("Amount of columns must fit to dataFields defined in timeseries: "
+                         "specify columns or adjust dataframe size (example: "
+                         "2 dataFields are defined plus the main value -> 3 columns must be given).\n"
+                         "Defined DataFields: \n{0}".format(data_fields))
+    if [field["name"] for field in data_fields] != list(names[1:]):
+        warnings.warn("make sure order of columns correspond to 1st: main value, 2-nth: "
+                      "dataFields order.\nDefined DataFields: \n{0}".format(data_fields))
+
+
+def column_values(series):
+    """
+    convert a column into a list of JSON serializable python values; missing values become None.
+    Datetime columns are formatted like the timestamps of the index.
+    """
+    if pd.api.types.is_datetime64_any_dtype(series.dtype):
+        values = _format_datetimes(pd.DatetimeIndex(series)).astype(object)
+        values[series.isna().to_numpy()] = None
+        return values.tolist()
+    if series.hasnans or not isinstance(series.dtype, np.dtype):
+        series = series.astype(object).where(series.notna(), None)
+    return series.tolist()
+
+
+def values_to_rows(dataframe, data_fields, columns=None, check=True):
+    """
+    convert a dataframe with timestamp index into the rows of an upload body, column by column
+
+    :param dataframe: dataframe containing data with timestamp as index
+    :type dataframe: pd.DataFrame
+    :param data_fields: dataFields defined in the timeseries
+    :type data_fields: list
+    :param columns: names of the columns to upload; 1st: main value, 2-nth: dataFields order.\\
+        If None, all columns of the dataframe are uploaded in their order.
+    :type columns: list
+    :param check: set to False if check_columns() was already called for these columns
+    :type check: bool
+    :return: list of rows (timestamp, main value, data fields...)
+    :rtype: list
+    """
+    if not columns:
+        columns = list(dataframe.columns)
+    if check:
+        check_columns(columns, data_fields)
+
+    values = [column_values(dataframe[column]) for column in columns]
+    return list(zip(format_timestamps(dataframe.index), *values))
+
+
+def encode_values(dataframe, data_fields, columns=None, check=True):
+    """
+    encode a dataframe with timestamp index into the JSON body of the upload endpoint, {"data": [...]};
+    see values_to_rows()
+
+    :return: request body
+    :rtype: bytes
+    """
+    return dumps({"data": values_to_rows(dataframe, data_fields, columns, check)})
@@ -1,38 +1,71 @@
 import json
 import warnings
+from functools import partial
 
 import pandas as pd
-import requests
 
+from mikecloudio.cache import NameIndex
+from mikecloudio.codec import check_columns, encode_values
+from mikecloudio.delete import Deletion, run_deletions
 from mikecloudio.timeseries import Timeseries, query_yes_no
+from mikecloudio.transport import map_concurrent, validate_response
+from mikecloudio.upload import UploadJournal, chunk_key, iter_chunks, rows_per_chunk, upload_chunks
+from mikecloudio.wrang import partition_df
+
+# dataTypes accepted for the dataFields of a timeseries
+DATA_FIELD_TYPES = ("DateTime", "Single", "Double", "Flag", "Text")
 
 
 class Dataset:
 
-    def __init__(self, connection, id_dataset="", name_dataset=""):
+    def __init__(self, connection, id_dataset="", name_dataset="", lazy=False):
+        """
+        Interact with a dataset of MIKE CLOUD, e.g. list, get, create or delete its timeseries.
+
+        :param connection: connection to the project containing the dataset
+        :type connection: mikecloudio.Connection
+        :param id_dataset: dataset ID
+        :type id_dataset: str
+        :param name_dataset: dataset name
+        :type name_dataset: str
+        :param lazy: if True, a missing name or id is not requested in the constructor but resolved on first access\\
+            of the name or id property, so creating the object sends no request
+        :type lazy: bool
+        """
         self.con = connection
         self._id_proj = connection.project_id
         self._id = id_dataset
         self._name = name_dataset
 
-        if id_dataset == "" and name_dataset != "":
-            self._id = self.con.query_ds_id(name_dataset)
-            self._name = name_dataset
-
-        elif id_dataset != "" and name_dataset == "":
-            self._name = self.con.query_ds_name(id_dataset)
-            self._id = id_dataset
-
         if self._id == "" and self._name == "":
             warnings.warn("neither dataset id nor dataset name were not defined (at least one value required).")
 
+        if not lazy:
+            self._id = self.id
+            self._name = self.name
+
         self.ts = None
-        self._header = {'dhi-open-api-key': '{0}'.format(connection._api_key),
-                        'Content-Type': 'application/json',
-                        'dhi-project-id': '{0}'.format(self._id_proj),
-                        'dhi-dataset-id': '{0}'.format(self._id),
-                        'dhi-service-id': 'timeseries',
-                        }
+
+    @property
+    def id(self):
+        if self._id == "" and self._name != "":
+            self._id = self.con.query_ds_id(self._name, self._id_proj)
+        return self._id
+
+    @property
+    def name(self):
+        if self._name == "" and self._id != "":
+            self._name = self.con.query_ds_name(self._id, self._id_proj)
+        return self._name
+
+    @property
+    def _header(self):
+        return {'dhi-open-api-key': '{0}'.format(self.con._api_key),
+                'Content-Type': 'application/json',
+                'dhi-project-id': '{0}'.format(self._id_proj),
+                'dhi-dataset-id': '{0}'.format(self.id),
+                'dhi-service-id': 'timeseries',
+                }
 
     # does not work yet
     def update_properties(self, properties, name="", id=""):
@@ -41,16 +74,18 @@ class Dataset:
             if id == "":
                 raise ValueError("timeseries of name {0} does not exist".format(name))
 
-        url = self.con.metadata_service_url + "api/ts/{0}/{1}".format(self._id, id)
+        url = self.con.metadata_service_url + "api/ts/{0}/{1}".format(self.id, id)
 
         dict_ = {
               "properties": properties
         }
 
         body = json.dumps(dict_)
-        response = requests.put(url, headers=self._header, data=body)
-        if response.status_code >= 300:
-            raise ValueError("request failed")
+        response = self.con.transport.put(url, headers=self._header, data=body)
+        validate_response(response, "request failed")
+        # the cached definition and listing still hold the old properties
+        self.con.metadata_cache.invalidate(("ts", self.id, id))
+        self.invalidate_ts_index()
 
         json_ = response.json()
         return json_
@@ -61,7 +96,7 @@ class Dataset:
 
         :return: ID of instance
         """
-        return self._id
+        return self.id
 
     def get_info(self, extended=False):
         """
@@ -73,14 +108,14 @@ class Dataset:
         :rtype: dict
         """
 
-        if self._id == "":
+        if self.id == "":
             raise ValueError("dataset id not set")
 
         if extended is True:
-            url = self.con.metadata_service_url + "api/ts/{0}".format(self._id)
+            url = self.con.metadata_service_url + "api/ts/{0}".format(self.id)
         else:
-            url = self.con.metadata_service_url + "api/project/{0}/dataset/{1}".format(self._id_proj, self._id)
-        response = requests.get(url, headers=self._header)
+            url = self.con.metadata_service_url + "api/project/{0}/dataset/{1}".format(self._id_proj, self.id)
+        response = self.con.transport.get(url, headers=self._header)
         dict_ = response.json()
         return dict_
 
@@ -95,19 +130,56 @@ class Dataset:
 
     def list_ts(self):
         """
-        request all timeseries related to dataset it
+        request all timeseries related to dataset it.
+        The definition of every listed timeseries is stored in the metadata cache of the connection.
 
         :return: dataframe with all timeseries in dataset
         :rtype: pd.DataFrame
         """
-        url = self.con.url + "api/ts/{0}/timeseries/list".format(self._id)
-        response = requests.get(url, headers=self._header)
-        if response.status_code >= 400:
-            raise ValueError("request failed")
-        resp_dict = response.json()["data"]
+        resp_dict, _ = self._request_ts_list()
         df = pd.DataFrame(resp_dict)
         return df
 
+    def _request_ts_list(self):
+        url = self.con.url + "api/ts/{0}/timeseries/list".format(self.id)
+        response = self.con.transport.get(url, headers=self._header)
+        validate_response(response, "request failed")
+        resp_dict = response.json()["data"]
+        for info in resp_dict:
+            if "id" in info and "item" in info and "dataFields" in info:
+                self.con.metadata_cache.set(("ts", self.id, info["id"]), info)
+        index = NameIndex(resp_dict, name_of=lambda info: info["item"]["name"])
+        self.con.metadata_cache.set(("ts-index", self.id), index)
+        return resp_dict, index
+
+    def ts_index(self, refresh=False):
+        """
+        index of all timeseries in the dataset by id and by name, built from a single list_ts() request
+        and kept in the metadata cache of the connection until its TTL expires
+
+        :param refresh: set to True to rebuild the index from a new listing
+        :type refresh: bool
+        :return: timeseries index
+        :rtype: mikecloudio.cache.NameIndex
+        """
+        index = None if refresh else self.con.metadata_cache.get(("ts-index", self.id))
+        if index is None:
+            _, index = self._request_ts_list()
+        return index
+
+    def invalidate_ts_index(self):
+        """
+        drop the cached timeseries index so that the next lookup lists the timeseries again
+        """
+        self.con.metadata_cache.invalidate(("ts-index", self.id))
+
+    def _lookup_ts(self, found):
+        # a cached index that misses may be outdated, so it is rebuilt once before giving up
+        index = self.con.metadata_cache.get(("ts-index", self.id))
+        if index is None or not found(index):
+            index = self.ts_index(refresh=True)
+        return index
+
     def query_ts_id(self, name):
         """
         function to query timeseries ID by its name
@@ -116,25 +188,19 @@ class Dataset:
         :return: timeseries ID
         :rtype: str
         """
-        df = self.list_ts()
-        _id = ""
-        if df.empty:
+        index = self._lookup_ts(lambda index: index.has_name(name))
+        if len(index) == 0:
             raise ValueError("no timeseries found for this dataset")
 
-        count = 0
+        ids = index.ids(name)
+        if len(ids) >= 2:
+            warning = "Warning: {0} timeseries with name '{1}' exist. Choose by ID to avoid errors"\
+                .format(len(ids), name)
+            warnings.warn(warning)
 
-        for i in range(len(df)):
-            if df["item"][i]["name"] == name:
-                _id = df["id"][i]
-                count += 1
-            if count >= 2:
-                warning = "Warning: {0} timeseries with name '{1}' exist. Choose by ID to avoid errors"\
-                    .format(count, name)
-                warnings.warn(warning)
-
-        if _id == "":
+        if not ids:
             raise ValueError("timeseries of name {0} does not exist".format(name))
-        return _id
+        return ids[-1]
 
     def query_ts_name(self, id):
         """
@@ -144,15 +210,11 @@ class Dataset:
         :return: timeseries name
         :rtype: str
         """
-        df = self.list_ts()
-        _name = ""
-        if df.empty:
+        index = self._lookup_ts(lambda index: id in index)
+        if len(index) == 0:
             raise ValueError("no timeseries found for this dataset")
 
-        for i in range(len(df)):
-            if df["id"][i] == id:
-                _name = df["item"][i]["name"]
-
+        _name = index.name(id, "")
         if _name == "":
             raise ValueError("timeseries with id {0} does not exist".format(id))
         return _name
@@ -166,20 +228,14 @@ class Dataset:
         :rtype: bool
 
         """
-        df = self.list_ts()
-        state = False
-        if df.empty:
+        index = self._lookup_ts(lambda index: index.has_name(name))
+        if len(index) == 0:
             print("no timeseries found for this dataset")
-            state = False
-            return state
+            return False
 
-        for i in range(len(df)):
-            if df["item"][i]["name"] == name:
-                state = True
-                break
-        return state
+        return index.has_name(name)
 
-    def get_ts(self, name="", id=""):
+    def get_ts(self, name="", id="", lazy=False):
         """
         function to get_ts by name or id and return a Timeseries object
 
@@ -187,6 +243,8 @@ class Dataset:
         :type name: str
         :param id: timeseries id
         :type id: str
+        :param lazy: if True, the name of a timeseries given by id is only requested when first accessed
+        :type lazy: bool
         :return: Timeseries object
         :rtype: Timeseries
         """
@@ -195,9 +253,192 @@ class Dataset:
 
         if id == "":
             raise ValueError("id of timeseries was not defined or does not exist")
-        self.ts = Timeseries(dataset=self, id_timeseries=id, name_timeseries=name)
+        self.ts = Timeseries(dataset=self, id_timeseries=id, name_timeseries=name, lazy=lazy)
         return self.ts
 
+    def timeseries(self, refresh=False):
+        """
+        function to get Timeseries objects for all timeseries in the dataset from a single listing.
+        The objects are created lazily and their item and dataFields are taken from the listing,
+        so neither creating them nor their first get_data() or add_data() call needs an extra request.
+
+        :param refresh: set to True to list the timeseries again instead of using the cached index
+        :type refresh: bool
+        :return: Timeseries objects in listing order
+        :rtype: list
+        """
+        index = self.ts_index(refresh=refresh)
+        return [Timeseries(dataset=self, id_timeseries=id, name_timeseries=index.name(id), lazy=True)
+                for id in index.records]
+
+    def get_data_many(self, ids_or_names=None, time_from=None, time_to=None, max_workers=8, how="wide",
+                      data_fields=False, stream=False):
+        """
+        request the data of many timeseries of the dataset concurrently.
+        The timeseries are resolved from a single listing, whose item and dataFields also serve the decoding,
+        so every timeseries costs exactly one values request.
+
+        :param ids_or_names: ids or names of the timeseries; if None, all timeseries of the dataset are requested
+        :type ids_or_names: list
+        :param time_from: specify from what timestamp data is requested; format: yyyy-mm-ddThhmmss.\\
+            If None, will return from first timestamp.
+        :param time_to: specify to what timestamp data is requested; format: yyyy-mm-ddThhmmss.\\
+            If None, will return up to latest timestamp.
+        :param max_workers: maximum number of timeseries requested at the same time
+        :type max_workers: int
+        :param how: "wide" for one column per timeseries aligned on the union of all timestamps,\\
+            "long" for rows of timestamp, timeseries, value and data fields
+        :type how: str
+        :param data_fields: if True, the wide frame gets (timeseries, column) columns including the dataFields,\\
+            otherwise only the main value of every timeseries is returned
+        :type data_fields: bool
+        :param stream: parse the responses while they are received, see Timeseries.get_data()
+        :type stream: bool
+        :return: typed dataframe with timestamp index (wide) or timestamp column (long); columns or the\\
+            timeseries column are labelled with the requested ids or names
+        :rtype: pd.DataFrame
+        """
+        if how not in ("wide", "long"):
+            raise ValueError("how must be 'wide' or 'long'")
+
+        index = self.ts_index()
+        if ids_or_names is None:
+            ids_or_names = [index.name(id) if len(index.ids(index.name(id))) == 1 else id for id in index.records]
+        labels = list(ids_or_names)
+        if any(label not in index and not index.has_name(label) for label in labels):
+            index = self.ts_index(refresh=True)
+
+        series = []
+        for label in labels:
+            if label in index:
+                series.append(Timeseries(dataset=self, id_timeseries=label, name_timeseries=index.name(label),
+                                         lazy=True))
+            elif index.has_name(label):
+                series.append(Timeseries(dataset=self, id_timeseries=index.ids(label)[-1], name_timeseries=label,
+                                         lazy=True))
+            else:
+                raise ValueError("timeseries {0} does not exist in dataset {1}".format(label, self.id))
+
+        frames = map_concurrent(lambda ts: ts.get_data(time_from, time_to, typed=True, stream=stream), series,
+                                max_workers)
+
+        if how == "long":
+            parts = []
+            for label, frame in zip(labels, frames):
+                frame = frame.rename(columns={frame.columns[0]: "value"})
+                frame.insert(0, "timeseries", label)
+                parts.append(frame)
+            if not parts:
+                return pd.DataFrame(columns=["timestamp", "timeseries", "value"])
+            return pd.concat(parts).reset_index()
+
+        if not data_fields:
+            frames = [frame.iloc[:, :1].set_axis([label], axis=1) for label, frame in zip(labels, frames)]
+            if not frames:
+                return pd.DataFrame(index=pd.DatetimeIndex([], name="timestamp"))
+            return pd.concat(frames, axis=1).sort_index()
+        return pd.concat(frames, axis=1, keys=labels, names=["timeseries", "column"]).sort_index()
+
+    def ingest(self, long_df, key_column, time_column=None, value_columns=None, create_missing=True, ts_options=None,
+               chunk_size=None, chunk_bytes=None, max_workers=8, encode_workers=1, progress=None, journal=None):
+        """
+        upload a long-format table holding the data of many timeseries, e.g. rows of station, timestamp, value
+        and data fields. The rows are partitioned by key_column in a single pass, every key is mapped to a
+        timeseries of the dataset by id or name, missing timeseries are created, and the chunks of all
+        timeseries are uploaded through one pipeline of max_workers concurrent requests sharing the pooled
+        session, retries and progress reporting.
+
+        :param long_df: table to upload
+        :type long_df: pd.DataFrame
+        :param key_column: column holding the timeseries id or name of every row
+        :type key_column: str
+        :param time_column: column holding the timestamps; if None, the index of long_df is used
+        :type time_column: str
+        :param value_columns: columns to upload; 1st: main value, 2-nth: dataFields order.\\
+            If None, all other columns in their order.
+        :type value_columns: list
+        :param create_missing: if True, keys matching no timeseries are created as timeseries of that name,\\
+            otherwise a ValueError is raised
+        :type create_missing: bool
+        :param ts_options: keyword arguments of create_ts for created timeseries, e.g. {"data_type": "Double"}
+        :type ts_options: dict
+        :param chunk_size: maximum number of rows sent per request
+        :type chunk_size: int
+        :param chunk_bytes: approximate maximum size of a request body in bytes
+        :type chunk_bytes: int
+        :param max_workers: maximum number of requests sent at the same time
+        :type max_workers: int
+        :param encode_workers: number of threads encoding chunks ahead of the uploads
+        :type encode_workers: int
+        :param progress: called as progress(rows_done, rows_total) after every chunk
+        :type progress: callable
+        :param journal: path of a journal file (or an UploadJournal) to resume an interrupted ingest; see\\
+            Timeseries.add_data
+        :type journal: str or mikecloudio.upload.UploadJournal
+        :return: Timeseries object of every key
+        :rtype: dict
+        """
+        if value_columns is None:
+            value_columns = [c for c in long_df.columns if c not in (key_column, time_column)]
+        value_columns = list(value_columns)
+        partitions = partition_df(long_df, key_column)
+
+        def unknown(index):
+            return [key for key in partitions if key not in index and not index.has_name(key)]
+
+        index = self._lookup_ts(lambda index: not unknown(index))
+        missing = unknown(index)
+        if missing:
+            if not create_missing:
+                raise ValueError("timeseries {0} do not exist in dataset {1}".format(missing, self.id))
+            self.create_ts_many([dict(ts_options or {}, name=key) for key in missing], max_workers)
+            index = self.ts_index(refresh=True)
+
+        series = {}
+        data_fields = {}
+        for key in partitions:
+            id = key if key in index else index.ids(key)[-1]
+            series[key] = Timeseries(dataset=self, id_timeseries=id, name_timeseries=index.name(id), lazy=True)
+            data_fields[id] = series[key].get_info()["dataFields"]
+            check_columns(value_columns, data_fields[id])
+
+        def frame(key):
+            part = partitions[key]
+            if time_column is not None:
+                part = part.set_index(time_column)
+            return part[value_columns]
+
+        def chunks(rows):
+            for key in partitions:
+                ts, df = series[key], frame(key)
+                if len(df) > 0:
+                    ts._forget_stored(df.index.min(), df.index.max())
+                for chunk in iter_chunks(df, rows):
+                    yield ts, chunk
+
+        def encode(item):
+            ts, chunk = item
+            return ts, encode_values(chunk, data_fields[ts.id], check=False)
+
+        def send(item):
+            ts, body = item
+            ts._post_values(body)
+
+        if journal is not None and not isinstance(journal, UploadJournal):
+            journal = UploadJournal(journal)
+
+        rows = chunk_size or len(long_df)
+        if partitions:
+            first = next(iter(partitions))
+            rows = rows_per_chunk(frame(first), lambda chunk: encode((series[first], chunk))[1], chunk_size,
+                                  chunk_bytes)
+        sent = upload_chunks(encode, send, chunks(rows), len(long_df), max_workers=max_workers,
+                             encode_workers=encode_workers, progress=progress, journal=journal,
+                             key=lambda item: "{0}|{1}".format(item[0].id, chunk_key(item[1])),
+                             size=lambda item: len(item[1]))
+        print("added {0} values to {1} timeseries".format(sent, len(series)))
+        return series
+
     # muss noch auf properties angepasst werden
     def create_ts(self, name, unit="eumUmeter", item="eumIWaterLevel", data_type="Single", data_fields=None,
                   properties=None):
@@ -219,89 +460,186 @@ class Dataset:
         :return: returns an instance of Timeseries corresponding to the created one
         :rtype: Timeseries
         """
-        if data_fields is None:
-            data_fields = []
-        if not isinstance(data_fields, list):
-            raise ValueError('data fields must be of type list containing dictionaries, e.g. '
-                             '[{"name": "example"},{"name": "example2"}]')
-        if properties is None:
-            properties = {}
-        if not isinstance(properties, dict):
-            raise ValueError("properties must be of type dictionary")
-
-        js = self.get_info(extended=True)
-        state = False
-        for key in properties:
-            for i in range(len(js["timeSeriesProperties"])):
-                if key == js["timeSeriesProperties"][i]["name"]:
-                    state = True
-            if not state:
-                raise ValueError(
-                    "properties name must fit to name defined in dataset - timeSeriesProperties: \n{0}".format(
-                        js["timeSeriesProperties"]))
-        datafield_types = ["DateTime", "Single", "Double", "Flag", "Text"]
-        format_cor = False
-        for i in range(len(data_fields)):
-            for j in range(len(datafield_types)):
-                if data_fields[i]["dataType"] == datafield_types[j]:
-                    format_cor = True
-            if not format_cor:
-                raise ValueError(
-                    "dataTypes of data fields must be of the following types: \n{0}".format(
-                        datafield_types))
-
-        url = self.con.metadata_service_url + "api/ts/{0}/timeseries".format(self._id)
+        spec = {"name": name, "unit": unit, "item": item, "data_type": data_type, "data_fields": data_fields,
+                "properties": properties}
+        body = ts_body(spec, self._ts_property_names() if properties else None)
+        return self._post_ts(body, invalidate=True)
 
-        dict_ = {
-            "item": {
-                "name": name,
-                "unit": unit,
-                "item": item,
-                "dataType": data_type
-            },
-            "properties": properties,
-            "dataFields": data_fields
+    def create_ts_many(self, specs, max_workers=8):
+        """
+        create many timeseries at once: the timeseries schema of the dataset is requested once, all specs are
+        validated locally before anything is created, and the creation requests are sent concurrently.
 
-        }
+        Example::
 
-        body = json.dumps(dict_)
-        response = requests.post(url, headers=self._header, data=body)
-        if response.status_code == 500 and properties is not None:
-            print("Status: ", response.status_code)
-            raise ValueError("request failed: "
-                             "make sure that dataType of dataset-timeseriesProperties fits to data type in properties")
-        if response.status_code >= 300:
-            print("Status: ", response.status_code)
-            raise ValueError("request failed")
+            ds.create_ts_many(["station_1", {"name": "station_2", "data_type": "Double",
+                                             "data_fields": [{"name": "flag", "dataType": "Flag"}]}])
 
-        dict_resp = response.json()
-        ts = Timeseries(dataset=self, id_timeseries=dict_resp["id"])
-        return ts
-
-    def del_ds(self):
+        :param specs: names, or dictionaries of the keyword arguments of create_ts (name is required)
+        :type specs: list
+        :param max_workers: maximum number of creation requests sent at the same time
+        :type max_workers: int
+        :return: Timeseries objects of the created timeseries in the order of specs
+        :rtype: list
+        """
+        specs = [{"name": spec} if isinstance(spec, str) else spec for spec in specs]
+        for spec in specs:
+            if "name" not in spec:
+                raise ValueError("every timeseries spec requires a name: {0}".format(spec))
+
+        property_names = None
+        if any(spec.get("properties") for spec in specs):
+            property_names = self._ts_property_names()
+        bodies = [ts_body(spec, property_names) for spec in specs]
+
+        try:
+            return map_concurrent(self._post_ts, bodies, max_workers)
+        finally:
+            self.invalidate_ts_index()
+
+    def _ts_property_names(self):
+        return {prop["name"] for prop in self.get_info(extended=True)["timeSeriesProperties"]}
+
+    def _post_ts(self, body, invalidate=False):
+        url = self.con.metadata_service_url + "api/ts/{0}/timeseries".format(self.id)
+        response = self.con.transport.post(url, headers=self._header, data=json.dumps(body))
+        if response.status_code == 500 and body["properties"]:
+            validate_response(response, "request failed: make sure that dataType of "
+                                        "dataset-timeseriesProperties fits to data type in properties")
+        validate_response(response, "request failed")
+
+        if invalidate:
+            self.invalidate_ts_index()
+        # the name is known from the request, so the handle does not need to look it up
+        return Timeseries(dataset=self, id_timeseries=response.json()["id"], name_timeseries=body["item"]["name"],
+                          lazy=True)
+
+    def del_ds(self, confirm=None):
         """
         function to delete dataset of the current instance
+
+        :param confirm: True deletes without asking, False does nothing; if None, the user is asked on the console
+        :type confirm: bool
         """
-        url = self.con.metadata_service_url + "api/project/{0}/dataset/{1}".format(self._id_proj, self._id)
-        confirm = query_yes_no("Are you sure you want to delete " + self._id_proj + " ?")
+        if confirm is None:
+            confirm = query_yes_no("Are you sure you want to delete " + self.id + " ?")
         if confirm is True:
-            response = requests.delete(url, headers=self.con.header())
-            if response.status_code >= 300:
-                raise ValueError("deletion request failed")
+            self.con._delete_ds(self.id, self._id_proj)
 
-    def del_ts(self, name="", id=""):
+    def del_ts(self, name="", id="", confirm=None):
         """
         function to delete a timeseries based on name or id
 
         :param name: name of timeseries
         :param id: ID of timeseries
+        :param confirm: True deletes without asking, False does nothing; if None, the user is asked on the console
+        :type confirm: bool
         """
         if name != "" and id == "":
             id = self.query_ts_id(name)
 
-        confirm = query_yes_no("Are you sure you want to delete " + name + " " + id + " ?")
+        if confirm is None:
+            confirm = query_yes_no("Are you sure you want to delete " + name + " " + id + " ?")
         if confirm is True:
-            url = self.con.metadata_service_url + "api/ts/{0}/timeseries/{1}".format(self._id, id)
-            response = requests.delete(url, headers=self._header)
-            if response.status_code >= 300:
-                raise ValueError("deletion request failed")
\ No newline at end of file
+            Timeseries(dataset=self, id_timeseries=id, name_timeseries=name, lazy=True)._delete()
+
+    def del_ts_many(self, targets, confirm=False, dry_run=False, max_workers=8, rate=None):
+        """
+        delete many timeseries, or data ranges of timeseries, without asking on the console.
+        All targets are resolved from a single listing, then the deletion requests are sent concurrently;
+        a failing target does not stop the others.
+
+        Example::
+
+            report = ds.del_ts_many(["station_1", "9f2c...", ("station_2", "2020-01-01T000000", None)],
+                                    dry_run=True)
+
+        :param targets: timeseries ids, names or Timeseries objects to delete, and (timeseries, time_from, time_to)\
+            tuples to delete the data of a time range only (format: yyyy-mm-ddThhmmss, None for an open bound)
+        :type targets: list
+        :param confirm: must be True to delete anything unless dry_run is set
+        :type confirm: bool
+        :param dry_run: if True, nothing is deleted; the report shows what would be deleted
+        :type dry_run: bool
+        :param max_workers: maximum number of deletion requests sent at the same time
+        :type max_workers: int
+        :param rate: maximum number of deletion requests started per second, or a RateLimiter shared with other\
+            bulk operations; None for no limit
+        :type rate: float or mikecloudio.transport.RateLimiter
+        :return: one row per target with target, kind, id, status ("deleted", "failed", "not found" or "dry run")\
+            and error
+        :rtype: pd.DataFrame
+        """
+        targets = list(targets)
+        refs = [target[0] if isinstance(target, tuple) else target for target in targets]
+
+        def resolvable(index):
+            return all(isinstance(ref, Timeseries) or ref in index or index.has_name(ref) for ref in refs)
+
+        index = self._lookup_ts(resolvable)
+        deletions = []
+        for target, ref in zip(targets, refs):
+            kind = "data" if isinstance(target, tuple) else "timeseries"
+            if isinstance(ref, Timeseries):
+                ts = ref
+            elif ref in index:
+                ts = Timeseries(dataset=self, id_timeseries=ref, name_timeseries=index.name(ref), lazy=True)
+            elif len(index.ids(ref)) == 1:
+                ts = Timeseries(dataset=self, id_timeseries=index.ids(ref)[0], name_timeseries=ref, lazy=True)
+            else:
+                error = "timeseries {0} does not exist".format(ref) if not index.has_name(ref) else \
+                    "{0} timeseries with name {1} exist, choose by ID".format(len(index.ids(ref)), ref)
+                deletions.append(Deletion(target, kind, error=error))
+                continue
+
+            if kind == "data":
+                _, time_from, time_to = target
+                delete = partial(ts._delete_data, time_from, time_to)
+            else:
+                delete = ts._delete
+            deletions.append(Deletion(target, kind, ts.id, delete))
+
+        return run_deletions(deletions, confirm, dry_run, max_workers, rate)
+
+
+def ts_body(spec, property_names=None):
+    """
+    validate a create_ts spec against the timeseries schema of a dataset and build its request body
+
+    :param spec: dictionary of the keyword arguments of Dataset.create_ts
+    :type spec: dict
+    :param property_names: names of the timeSeriesProperties of the dataset; required if spec has properties
+    :type property_names: set
+    :return: request body
+    :rtype: dict
+    """
+    data_fields = spec.get("data_fields")
+    if data_fields is None:
+        data_fields = []
+    if not isinstance(data_fields, list):
+        raise ValueError('data fields must be of type list containing dictionaries, e.g. '
+                         '[{"name": "example"},{"name": "example2"}]')
+    properties = spec.get("properties")
+    if properties is None:
+        properties = {}
+    if not isinstance(properties, dict):
+        raise ValueError("properties must be of type dictionary")
+
+    if properties and not set(properties) <= property_names:
+        raise ValueError("properties name must fit to name defined in dataset - timeSeriesProperties: \n{0}"
+                         .format(sorted(property_names)))
+    for field in data_fields:
+        if field.get("dataType") not in DATA_FIELD_TYPES:
+            raise ValueError("dataTypes of data fields must be of the following types: \n{0}"
+                             .format(list(DATA_FIELD_TYPES)))
+
+    return {
+        "item": {
+            "name": spec["name"],
+            "unit": spec.get("unit", "eumUmeter"),
+            "item": spec.get("item", "eumIWaterLevel"),
+            "dataType": spec.get("data_type", "Single")
+        },
+        "properties": properties,
+        "dataFields": data_fields
+    }
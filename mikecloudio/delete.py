@@ -0,0 +1,72 @@
+import pandas as pd
+
+from mikecloudio.transport import RateLimiter, map_concurrent
+
+REPORT_COLUMNS = ["target", "kind", "id", "status", "error"]
+
+
+class Deletion:
+
+    def __init__(self, target, kind, id=None, delete=None, error=None):
+        """
+        One planned deletion of a bulk delete: the target as given, what it resolved to and how to delete it.
+
+        :param target: target as passed by the caller
+        :param kind: "dataset", "timeseries" or "data"
+        :type kind: str
+        :param id: id of the resolved dataset or timeseries; None if the target could not be resolved
+        :type id: str
+        :param delete: function sending the deletion request
+        :type delete: callable
+        :param error: reason why the target cannot be deleted, e.g. it does not exist
+        :type error: str
+        """
+        self.target = target
+        self.kind = kind
+        self.id = id
+        self.delete = delete
+        self.error = error
+
+
+def run_deletions(deletions, confirm=False, dry_run=False, max_workers=8, rate=None):
+    """
+    send the requests of a bulk delete concurrently and report the outcome of every item.
+    Failing items do not stop the others.
+
+    :param deletions: planned deletions
+    :type deletions: list
+    :param confirm: must be True to delete anything unless dry_run is set
+    :type confirm: bool
+    :param dry_run: if True, nothing is deleted; the report shows what would be deleted
+    :type dry_run: bool
+    :param max_workers: maximum number of deletion requests sent at the same time
+    :type max_workers: int
+    :param rate: maximum number of deletion requests started per second, or a RateLimiter; None for no limit
+    :type rate: float or mikecloudio.transport.RateLimiter
+    :return: one row per deletion with target, kind, id, status ("deleted", "failed", "not found" or "dry run")\\
+        and error
+    :rtype: pd.DataFrame
+    """
+    if not dry_run and not confirm:
+        raise ValueError("bulk deletion is irreversible: pass confirm=True to delete, or dry_run=True to "
+                         "only report what would be deleted")
+    if rate is not None and not isinstance(rate, RateLimiter):
+        rate = RateLimiter(rate)
+
+    def run(deletion):
+        if deletion.error is not None:
+            return "not found", deletion.error
+        if dry_run:
+            return "dry run", None
+        if rate is not None:
+            rate.acquire()
+        try:
+            deletion.delete()
+        except Exception as e:
+            return "failed", str(e)
+        return "deleted", None
+
+    outcomes = map_concurrent(run, deletions, max_workers)
+    rows = [[deletion.target, deletion.kind, deletion.id, status, error]
+            for deletion, (status, error) in zip(deletions, outcomes)]
+    return pd.DataFrame(rows, columns=REPORT_COLUMNS)
@@ -0,0 +1,54 @@
+class MikeCloudError(ValueError):
+
+    def __init__(self, message, response=None):
+        """
+        Base class of all errors raised for failed MIKE CLOUD requests.
+        Derives from ValueError so that existing ``except ValueError`` handlers keep working.
+
+        :param message: error message
+        :type message: str
+        :param response: response that caused the error, if any
+        :type response: requests.Response
+        """
+        super().__init__(message)
+        self.response = response
+
+    @property
+    def status_code(self):
+        if self.response is None:
+            return None
+
+        return self.response.status_code
+
+
+class AuthorizationError(MikeCloudError):
+    """raised for 401 and 403 responses"""
+
+
+class NotFoundError(MikeCloudError):
+    """raised for 404 responses"""
+
+
+class RequestFailedError(MikeCloudError):
+    """raised for any other unsuccessful response, including 500, which the service returns for invalid requests"""
+
+
+class ThrottledError(MikeCloudError):
+
+    def __init__(self, message, response=None, retry_after=None):
+        """
+        Raised for 429 responses once all retries are used up.
+
+        :param retry_after: seconds the service asked to wait, if given
+        :type retry_after: float
+        """
+        super().__init__(message, response)
+        self.retry_after = retry_after
+
+
+class ServiceUnavailableError(MikeCloudError):
+    """raised for 5xx responses other than 500 and for connection errors or timeouts"""
+
+
+class CircuitOpenError(MikeCloudError):
+    """raised without sending a request while the circuit breaker is open"""
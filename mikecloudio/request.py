@@ -1,14 +1,26 @@
 import json
+from functools import partial
+from pathlib import Path
+
 import requests
 import pandas as pd
 
 from mikecloudio.timeseries import query_yes_no
+from mikecloudio.appender import Appender
+from mikecloudio.cache import NameIndex, TTLCache
 from mikecloudio.dataset import Dataset
+from mikecloudio.delete import Deletion, run_deletions
+from mikecloudio.store import LocalStore
+from mikecloudio.transfer import IMPORT_COMMAND, upload_file, wait_for_transfer
+from mikecloudio.transport import Transport, validate_response
 
 
-def request(command, service_url, headers, json_key="data"):
+def request(command, service_url, headers, json_key="data", transport=None):
     url = service_url + command
-    response = requests.get(url, headers=headers)
+    if transport is None:
+        response = requests.get(url, headers=headers)
+    else:
+        response = transport.get(url, headers=headers)
     validate_response(response)
     if json_key is None:
         return response.json()
@@ -24,14 +36,6 @@ def create_command(commands, delimiter='/'):
     return delimiter.join(commands)
 
 
-def validate_response(response):
-    if response.status_code == 401:
-        raise ValueError("Not authorized to make this request.")
-
-    if response.status_code >= 300:
-        raise ValueError("Request failed: Check api key.")
-
-
 def read_api_key_from_text_file(api_key_file_path):
     with open(api_key_file_path) as file:
         return file.readline()
@@ -40,10 +44,14 @@ def read_api_key_from_text_file(api_key_file_path):
 class Connection:
 
     def __init__(self, api_key, project_name=None, project_id=None,
-                 service_url="https://core-metadata-prod.azurewebsites.net/"):
+                 service_url="https://core-metadata-prod.azurewebsites.net/", session=None, timeout=(3.05, 60),
+                 pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, retry_policy=None,
+                 circuit_breaker=None, metadata_ttl=300, local_store=None):
         """
         Connect and interact with MIKE CLOUD data,
         e.g. list all projects, get, create, update, or delete datasets.
+        All requests of the connection and of the Dataset and Timeseries objects created from it
+        share one pooled keep-alive session.
 
         :param api_key: api key that gives access to desired projects
         :type api_key: str
@@ -53,8 +61,33 @@ class Connection:
         :type project_name: str
         :param service_url: metadata service url
         :type service_url: str
+        :param session: existing requests session to use; if None a pooled session is created
+        :type session: requests.Session
+        :param timeout: default request timeout in seconds, either a single value or a (connect, read) tuple
+        :type timeout: float or tuple
+        :param pool_connections: number of per-host connection pools to keep
+        :type pool_connections: int
+        :param pool_maxsize: maximum number of connections kept alive per host
+        :type pool_maxsize: int
+        :param pool_block: if True, block when all connections of a host are in use instead of opening a new one
+        :type pool_block: bool
+        :param keep_alive: if False, connections are closed after every request
+        :type keep_alive: bool
+        :param retry_policy: retry and backoff policy for transient failures; if None the default RetryPolicy is used
+        :type retry_policy: mikecloudio.transport.RetryPolicy
+        :param circuit_breaker: circuit breaker shared by all requests; if None the default CircuitBreaker is used
+        :type circuit_breaker: mikecloudio.transport.CircuitBreaker
+        :param metadata_ttl: seconds timeseries metadata (item, dataFields) stays cached; None caches until \\
+            invalidated, 0 disables the cache
+        :type metadata_ttl: float
+        :param local_store: directory (or LocalStore) keeping a local copy of requested timeseries data; typed and\
+            streamed get_data() calls then only request the time ranges not stored yet
+        :type local_store: str or mikecloudio.store.LocalStore
         """
         self.url = service_url
+        self.transport = Transport(session=session, timeout=timeout, pool_connections=pool_connections,
+                                   pool_maxsize=pool_maxsize, pool_block=pool_block, keep_alive=keep_alive,
+                                   retry_policy=retry_policy, circuit_breaker=circuit_breaker)
         self._api_key = api_key
         self.project_id = project_id
         self.project_name = project_name
@@ -62,6 +95,11 @@ class Connection:
         self._upload_url = None
         self._projects = None
         self._header = create_header(api_key)
+        self.metadata_cache = TTLCache(ttl=metadata_ttl)
+        self._appender = None
+        if local_store is not None and not isinstance(local_store, LocalStore):
+            local_store = LocalStore(local_store)
+        self.local_store = local_store
 
         self.validate_project(project_id, project_name)
 
@@ -73,10 +111,33 @@ class Connection:
         if project_name is None:
             self.project_name = self.get_project_name_from_id(project_id)
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        upload the rows buffered in the ingest queue, then close the pooled session and all its connections
+        """
+        if self._appender is not None:
+            self._appender.close()
+            self._appender = None
+        self.transport.close()
+
     @property
     def api_key(self):
         return self._api_key
 
+    @property
+    def metadata_service_url(self):
+        return self.url
+
+    @property
+    def session(self):
+        return self.transport.session
+
     @property
     def projects(self):
         if self._projects is None:
@@ -91,8 +152,29 @@ class Connection:
 
         return self._upload_url
 
-    def request(self, command):
-        return request(command, self.url, self._header)
+    def ingest_queue(self, **kwargs):
+        """
+        write-behind buffer shared by all timeseries of the connection: rows appended to it are uploaded in the
+        background by size and age, on flush() and at interpreter exit; see mikecloudio.appender.Appender.
+        The queue is created on the first call, keyword arguments are passed to Appender then; later calls may
+        repeat them but not change them.
+
+        :return: the ingest queue of the connection
+        :rtype: mikecloudio.appender.Appender
+        :raises ValueError: if keyword arguments differ from the settings of the existing queue
+        """
+        if self._appender is None:
+            self._appender = Appender(**kwargs)
+            return self._appender
+
+        changed = {key: value for key, value in kwargs.items() if getattr(self._appender, key) != value}
+        if changed:
+            raise ValueError("the ingest queue of the connection already exists with other settings, "
+                             "close the connection or create an Appender to use {0}".format(changed))
+        return self._appender
+
+    def request(self, command, json_key="data"):
+        return request(command, self.url, self._header, json_key=json_key, transport=self.transport)
 
     def request_projects(self):
         """
@@ -116,6 +198,65 @@ class Connection:
     def request_upload_url(self):
         return self.request("api/transfer/upload-url")
 
+    def import_file(self, path, reader_name, writer_name, reader_parameters=None, writer_parameters=None,
+                    output_dataset=None, wait=True, poll_interval=5.0, timeout=None):
+        """
+        import a local file through the transfer service instead of the JSON endpoints: the file is uploaded in one
+        streamed PUT to a fresh transfer upload url, then the server-side import is started and, if wait is True,
+        polled until it finished.
+
+        :param path: path of the file to import
+        :type path: str
+        :param reader_name: name of the reader of the conversion service that reads the file
+        :type reader_name: str
+        :param writer_name: name of the writer of the conversion service that writes the data
+        :type writer_name: str
+        :param reader_parameters: reader parameters, e.g. [{"name": "...", "value": "..."}]
+        :type reader_parameters: list
+        :param writer_parameters: writer parameters, e.g. [{"name": "...", "value": "..."}]
+        :type writer_parameters: list
+        :param output_dataset: properties of the dataset to create, e.g. {"name": ..., "description": ...};\\
+            None if the writer parameters select an existing target
+        :type output_dataset: dict
+        :param wait: if True, block until the import finished
+        :type wait: bool
+        :param poll_interval: seconds between two status requests
+        :type poll_interval: float
+        :param timeout: maximum seconds to wait for the import; None waits until it finished
+        :type timeout: float
+        :return: status of the import; contains its "id"
+        :rtype: dict
+        """
+        path = Path(path)
+        # an upload url is valid for a single file, so a new one is requested for every import and kept out of the
+        # url cached for the JSON uploads
+        upload_url = self.request_upload_url()
+        upload_file(self.transport, upload_url, path)
+
+        dict_ = {
+            "originalFileName": path.name,
+            "uploadUrl": upload_url,
+            "projectId": self.project_id,
+            "readerName": reader_name,
+            "writerName": writer_name,
+            "readerParameters": reader_parameters or [],
+            "writerParameters": writer_parameters or [],
+        }
+        if output_dataset is not None:
+            dict_["outputDatasetData"] = output_dataset
+
+        header = {'dhi-open-api-key': '{0}'.format(self._api_key), 'Content-Type': 'application/json',
+                  'dhi-project-id': '{0}'.format(self.project_id)}
+        response = self.transport.post(self.url + IMPORT_COMMAND, headers=header, data=json.dumps(dict_))
+        validate_response(response, "starting the import failed")
+        status = response.json()
+        if output_dataset is not None:
+            self.invalidate_ds_index()
+        if not wait:
+            return status
+
+        return wait_for_transfer(self, status["id"], poll_interval, timeout)
+
     def get_project_id_from_name(self, project_name):
         projects = self.projects
         project_id = projects['id'].loc[projects['name'] == project_name]
@@ -142,6 +283,47 @@ class Connection:
 
         return pd.DataFrame(self.request(command))
 
+    def ds_index(self, project_id=None, refresh=False):
+        """
+        index of all datasets of a project by id and by name, built from a single dataset/list-summaries request
+        and kept in the metadata cache until its TTL expires or a dataset is created, updated or deleted
+
+        :param project_id: project ID; defaults to the project of the connection
+        :type project_id: str
+        :param refresh: set to True to rebuild the index from a new listing
+        :type refresh: bool
+        :return: dataset index
+        :rtype: mikecloudio.cache.NameIndex
+        """
+        if project_id is None:
+            project_id = self.project_id
+
+        index = None if refresh else self.metadata_cache.get(("ds-index", project_id))
+        if index is None:
+            index = NameIndex(self.request(f"api/project/{project_id}/dataset/list-summaries"))
+            self.metadata_cache.set(("ds-index", project_id), index)
+        return index
+
+    def invalidate_ds_index(self, project_id=None):
+        """
+        drop the cached dataset index so that the next lookup lists the datasets again
+
+        :param project_id: project ID; defaults to the project of the connection
+        :type project_id: str
+        """
+        if project_id is None:
+            project_id = self.project_id
+        self.metadata_cache.invalidate(("ds-index", project_id))
+
+    def _lookup_ds(self, found, project_id=None):
+        # a cached index that misses may be outdated, so it is rebuilt once before giving up
+        if project_id is None:
+            project_id = self.project_id
+        index = self.metadata_cache.get(("ds-index", project_id))
+        if index is None or not found(index):
+            index = self.ds_index(project_id, refresh=True)
+        return index
+
     def create_ds(self, name, descr, prop_ds=None, metadata_ds=None, prop_ts=None, content_type="application/json"):
         """
         function to create a new dataset
@@ -166,25 +348,7 @@ class Connection:
         :return: returns a new Dataset object
         :rtype: mikecloudio.dataset.Dataset
         """
-        if prop_ds is None:
-            prop_ds = {}
-        if metadata_ds is None:
-            metadata_ds = {}
-        if prop_ts is None:
-            prop_ts = []
-        if not isinstance(prop_ts, list):
-            raise ValueError("prop_ts must be of type list containing type dict")
-
-        types = ["DateTime", "Long", "Double", "Boolean", "Text"]
-        count = 0
-        for i in range(len(prop_ts)):
-            if "name" not in prop_ts[i].keys() or "dataType" not in prop_ts[i].keys():
-                raise ValueError("properties timeseries (prop_ts) must contain keys 'name' and 'dataType'")
-            for typ in types:
-                if prop_ts[i]["dataType"] == typ:
-                    count += 1
-        if count != len(prop_ts):
-            raise ValueError("dataType must be 'DateTime', 'Long', 'Double', 'Boolean' or 'Text'")
+        body = dataset_body(name, descr, prop_ds, metadata_ds, prop_ts)
 
         if self.project_id == "":
             raise ValueError("set project ID with function setProject() first")
@@ -193,43 +357,24 @@ class Connection:
                   'dhi-project-id': '{0}'.format(self.project_id), 'dhi-service-id': "timeseries"}
 
         url = self.url + "api/ts/dataset"
-
-        dict_ = {"timeSeriesSchema": {
-            "properties":
-                prop_ts
-
-        },
-
-            "datasetProperties": {
-                "name": name,
-                "description": descr,
-                "metadata": metadata_ds,
-                "properties": prop_ds
-            }
-
-        }
-
-        body = json.dumps(dict_)
-        response = requests.post(url, headers=header, data=body)
+        response = self.transport.post(url, headers=header, data=body)
+        validate_response(response, "request failed")
         json_ = response.json()
-
-        if response.status_code == 401:
-            raise ValueError("not authorized to make this request")
-        elif response.status_code >= 300:
-            print("json response: ", json_)
-            raise ValueError("request failed")
+        self.invalidate_ds_index()
         ds = Dataset(connection=self, id_dataset=json_["id"])
         return ds
 
     def create_dataset(self, name=None, id=None):
         pass
 
-    def get_ds(self, name="", id="", project_id=None):
+    def get_ds(self, name="", id="", project_id=None, lazy=False):
         """
         function to create a Dataset object according the project id / or project name
 
         :param id: ID of dataset
         :param name: name of dataset
+        :param lazy: if True, the name of a dataset given by id is only requested when first accessed
+        :type lazy: bool
         :return: Dataset instance
         :rtype: Dataset
         """
@@ -238,15 +383,10 @@ class Connection:
 
             if id == "":
                 raise ValueError("dataset of name {0} does not exist".format(name))
-            dataset = Dataset(connection=self, name_dataset=name)
 
-        if name != "" and id != "":
-            dataset = Dataset(connection=self, id_dataset=id, name_dataset=name)
-
-        else:
-            if id == "":
-                raise ValueError("id of dataset was not defined or does not exist")
-            dataset = Dataset(connection=self, id_dataset=id)
+        if id == "":
+            raise ValueError("id of dataset was not defined or does not exist")
+        dataset = Dataset(connection=self, id_dataset=id, name_dataset=name, lazy=lazy)
         return dataset
 
     # updates a Dataset: not tested yet
@@ -256,41 +396,18 @@ class Connection:
         if self.project_id == "":
             raise ValueError("set project ID with function setProject() first")
 
-        if temp_info is None:
-            temp_info = {}
-        if spat_info is None:
-            spat_info = {}
-        if add_prop is None:
-            add_prop = {}
-        if metadata is None:
-            metadata = {}
-
         url = self.url + "api/project/{0}/dataset".format(self.project_id)
+        body = dataset_update_body(dataset_id, name_update, descr_update, type_ds, temp_info, spat_info, add_prop,
+                                   metadata)
 
-        dict_ = {
-            "id": dataset_id,
-            "name": name_update,
-            "description": descr_update,
-            "datasetType": type_ds,
-            "temporalInformation": temp_info,
-            "spatialInformation": spat_info,
-            "metadata": metadata,
-            "properties": add_prop,
-            "tags": [
-                "string"
-            ]
-        }
-
-        body = json.dumps(dict_)
-
-        response = requests.put(url, headers=self._header, data=body)
-        if response.status_code >= 300:
-            raise ValueError("request failed")
+        response = self.transport.put(url, headers=self._header, data=body)
+        validate_response(response, "request failed")
+        self.invalidate_ds_index()
 
         json_ = response.json()
         return json_
 
-    def del_ds(self, name="", id=""):
+    def del_ds(self, name="", id="", confirm=None):
         """
         function to request deletion of a dataset
 
@@ -298,65 +415,188 @@ class Connection:
         :type id: str
         :param name: name of dataset
         :type name: str
+        :param confirm: True deletes without asking, False does nothing; if None, the user is asked on the console
+        :type confirm: bool
         """
 
         if name != "" and id == "":
             id = self.query_ds_id(name)
 
-        confirm = query_yes_no("Are you sure you want to delete " + name + " " + id + " ?")
+        if confirm is None:
+            confirm = query_yes_no("Are you sure you want to delete " + name + " " + id + " ?")
         if confirm is True:
-            url = self.url + "api/project/{0}/dataset/{1}".format(self.project_id, id)
-            response = requests.delete(url, headers=self._header)
-            if response.status_code == 401:
-                raise ValueError("not authorized to make this request")
-            elif response.status_code >= 300:
-                raise ValueError("request failed")
-
-    def query_ds_id(self, name, project_id):
+            self._delete_ds(id)
+
+    def del_ds_many(self, targets, confirm=False, dry_run=False, max_workers=8, rate=None, project_id=None):
+        """
+        delete many datasets without asking on the console.
+        All targets are resolved from a single listing, then the deletion requests are sent concurrently;
+        a failing target does not stop the others.
+
+        :param targets: dataset ids or names
+        :type targets: list
+        :param confirm: must be True to delete anything unless dry_run is set
+        :type confirm: bool
+        :param dry_run: if True, nothing is deleted; the report shows what would be deleted
+        :type dry_run: bool
+        :param max_workers: maximum number of deletion requests sent at the same time
+        :type max_workers: int
+        :param rate: maximum number of deletion requests started per second, or a RateLimiter; None for no limit
+        :type rate: float or mikecloudio.transport.RateLimiter
+        :param project_id: project ID; defaults to the project of the connection
+        :type project_id: str
+        :return: one row per target with target, kind, id, status ("deleted", "failed", "not found" or "dry run")\\
+            and error
+        :rtype: pd.DataFrame
         """
-        function to query the dataset id with the help of function list_ds()
+        if project_id is None:
+            project_id = self.project_id
+        targets = list(targets)
+        index = self._lookup_ds(lambda index: all(t in index or index.has_name(t) for t in targets), project_id)
+
+        deletions = []
+        for target in targets:
+            if target in index:
+                id = target
+            elif len(index.ids(target)) == 1:
+                id = index.ids(target)[0]
+            else:
+                error = "dataset {0} does not exist".format(target) if not index.has_name(target) else \
+                    "{0} datasets with name {1} exist, choose by ID".format(len(index.ids(target)), target)
+                deletions.append(Deletion(target, "dataset", error=error))
+                continue
+            deletions.append(Deletion(target, "dataset", id, partial(self._delete_ds, id, project_id)))
+
+        return run_deletions(deletions, confirm, dry_run, max_workers, rate)
+
+    def _delete_ds(self, id, project_id=None):
+        if project_id is None:
+            project_id = self.project_id
+        url = self.url + "api/project/{0}/dataset/{1}".format(project_id, id)
+        response = self.transport.delete(url, headers=self._header)
+        validate_response(response, "deletion request failed")
+        self.invalidate_ds_index(project_id)
+        self.metadata_cache.invalidate_prefix(("ts", id))
+        self.metadata_cache.invalidate(("ts-index", id))
+        if self.local_store is not None:
+            self.local_store.clear_dataset(id)
+
+    def query_ds_id(self, name, project_id=None):
+        """
+        function to query the dataset id with the help of the dataset index ds_index()
 
         :param name: name of the dataset
+        :param project_id: project ID; defaults to the project of the connection
         :return: id of the dataset
         :rtype: str
         """
-        df = self.request_datasets(project_id)
-        _id = ""
+        index = self._lookup_ds(lambda index: index.has_name(name), project_id)
 
-        if df.empty:
+        if len(index) == 0:
             raise ValueError("no datasets found for this project")
-        for i in range(len(df)):
-            if df["name"][i] == name:
-                _id = df["id"][i]
-                break
-        if _id == "":
-            raise ValueError("timeseries of name {0} does not exist".format(name))
+        ids = index.ids(name)
+        if not ids:
+            raise ValueError("dataset of name {0} does not exist".format(name))
 
-        return _id
+        return ids[0]
 
-    def query_ds_name(self, id, project_id):
+    def query_ds_name(self, id, project_id=None):
         """
-        function to query the dataset id with the help of function list_ds()
+        function to query the dataset name with the help of the dataset index ds_index()
 
         :param id: dataset id
+        :param project_id: project ID; defaults to the project of the connection
         :return: name of the dataset
         :rtype: str
         """
-        df = self.request_datasets(project_id)
-        _name = ""
+        index = self._lookup_ds(lambda index: id in index, project_id)
 
-        if df.empty:
+        if len(index) == 0:
             raise ValueError("no datasets found for this project")
-        for i in range(len(df)):
-            if df["id"][i] == id:
-                _name = df["name"][i]
-                break
+        _name = index.name(id, "")
         if _name == "":
             raise ValueError("dataset of id {0} does not exist".format(id))
 
         return _name
 
 
+def dataset_body(name, descr, prop_ds=None, metadata_ds=None, prop_ts=None):
+    """
+    build and check the body of a dataset creation request; see Connection.create_ds
+
+    :return: JSON body
+    :rtype: str
+    """
+    if prop_ds is None:
+        prop_ds = {}
+    if metadata_ds is None:
+        metadata_ds = {}
+    if prop_ts is None:
+        prop_ts = []
+    if not isinstance(prop_ts, list):
+        raise ValueError("prop_ts must be of type list containing type dict")
+
+    types = ["DateTime", "Long", "Double", "Boolean", "Text"]
+    count = 0
+    for i in range(len(prop_ts)):
+        if "name" not in prop_ts[i].keys() or "dataType" not in prop_ts[i].keys():
+            raise ValueError("properties timeseries (prop_ts) must contain keys 'name' and 'dataType'")
+        for typ in types:
+            if prop_ts[i]["dataType"] == typ:
+                count += 1
+    if count != len(prop_ts):
+        raise ValueError("dataType must be 'DateTime', 'Long', 'Double', 'Boolean' or 'Text'")
+
+    dict_ = {"timeSeriesSchema": {
+        "properties":
+            prop_ts
+
+    },
+
+        "datasetProperties": {
+            "name": name,
+            "description": descr,
+            "metadata": metadata_ds,
+            "properties": prop_ds
+        }
+
+    }
+    return json.dumps(dict_)
+
+
+def dataset_update_body(dataset_id, name_update, descr_update, type_ds="file", temp_info=None, spat_info=None,
+                        add_prop=None, metadata=None):
+    """
+    build the body of a dataset update request; see Connection.update_ds
+
+    :return: JSON body
+    :rtype: str
+    """
+    if temp_info is None:
+        temp_info = {}
+    if spat_info is None:
+        spat_info = {}
+    if add_prop is None:
+        add_prop = {}
+    if metadata is None:
+        metadata = {}
+
+    dict_ = {
+        "id": dataset_id,
+        "name": name_update,
+        "description": descr_update,
+        "datasetType": type_ds,
+        "temporalInformation": temp_info,
+        "spatialInformation": spat_info,
+        "metadata": metadata,
+        "properties": add_prop,
+        "tags": [
+            "string"
+        ]
+    }
+    return json.dumps(dict_)
+
+
 class Project:
 
     def __init__(self, project_id, project_name):
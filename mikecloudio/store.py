@@ -0,0 +1,301 @@
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+_MIN = pd.Timestamp.min
+_MAX = pd.Timestamp.max
+_FORMAT = "%Y-%m-%dT%H%M%S"
+_MERGE_PARTS = 8
+
+
+class LocalStore:
+
+    def __init__(self, path, format=None, part_rows=500000):
+        """
+        Persistent local copy of timeseries data with incremental sync.
+        Every timeseries is kept in a directory under path as part files of at most part_rows rows, indexed
+        together with the time ranges it covers. A request for a range only fetches the parts not covered yet,
+        typically the tail since the last sync, and writes them as new part files; the request is answered from the
+        part files overlapping it, so neither reading a window nor syncing the tail touches the rest of the stored
+        data. Ranges are only covered up to the time they were fetched, so data added later at newer timestamps is
+        fetched by the next request.
+
+        :param path: directory of the store; created if it does not exist
+        :type path: str or pathlib.Path
+        :param format: "parquet" (requires pyarrow) or "pickle"; if None, parquet is used when pyarrow is installed
+        :type format: str
+        :param part_rows: maximum number of rows of a part file; small parts written by successive syncs are merged up
+            to this size
+        :type part_rows: int
+        """
+        if format is None:
+            format = "parquet" if pyarrow is not None else "pickle"
+        if format not in ("parquet", "pickle"):
+            raise ValueError("format must be 'parquet' or 'pickle'")
+        if part_rows < 1:
+            raise ValueError("part_rows must be positive")
+        self.path = Path(path)
+        self.format = format
+        self.part_rows = part_rows
+        self._lock = threading.Lock()
+        self._ts_locks = {}
+
+    def get_data(self, timeseries, time_from=None, time_to=None, fetch=None):
+        """
+        return the data of a timeseries between time_from and time_to, fetching only the ranges not stored yet
+
+        :param timeseries: timeseries to read
+        :type timeseries: mikecloudio.Timeseries
+        :param time_from: first timestamp; format: yyyy-mm-ddThhmmss. If None, from the first timestamp.
+        :param time_to: last timestamp; format: yyyy-mm-ddThhmmss. If None, up to the latest timestamp.
+        :param fetch: function fetch(time_from, time_to) returning a typed dataframe of the service;\\
+            defaults to timeseries.get_data(..., typed=True) without the store
+        :type fetch: callable
+        :return: typed dataframe with timestamp index
+        :rtype: pd.DataFrame
+        """
+        if fetch is None:
+            fetch = timeseries._request_typed
+        start = _MIN if time_from is None else pd.Timestamp(time_from)
+        end = _MAX if time_to is None else pd.Timestamp(time_to)
+
+        with self._ts_lock(timeseries):
+            index = self._read_index(timeseries)
+            missing = _subtract([(start, end)], index["coverage"])
+            if missing:
+                synced = pd.Timestamp.now(tz="UTC").tz_localize(None).floor("s")
+                parts = []
+                for a, b in missing:
+                    # the service takes whole seconds, so the requested range is widened to them
+                    part = fetch(None if a == _MIN else a.floor("s").strftime(_FORMAT),
+                                 None if b == _MAX else b.ceil("s").strftime(_FORMAT))
+                    parts.append((a, b, part))
+                for a, b, part in parts:
+                    self._replace(timeseries, index, a, b, part[_between(part.index, a, b)])
+                self._compact(timeseries, index)
+                covered = [(a, min(b, synced)) for a, b, _ in parts if a <= min(b, synced)]
+                index["coverage"] = _union(index["coverage"] + covered)
+                self._write_index(timeseries, index)
+            data = self._load(timeseries, index, start, end)
+
+        if data is None:
+            return fetch(time_from, time_to)
+        return data
+
+    def read(self, timeseries, time_from=None, time_to=None):
+        """
+        :param time_from: first timestamp; if None, from the first stored timestamp
+        :param time_to: last timestamp; if None, up to the last stored timestamp
+        :return: stored data of a timeseries, only reading the part files overlapping the range; None if nothing is
+            stored
+        :rtype: pd.DataFrame
+        """
+        start = _MIN if time_from is None else pd.Timestamp(time_from)
+        end = _MAX if time_to is None else pd.Timestamp(time_to)
+        with self._ts_lock(timeseries):
+            return self._load(timeseries, self._read_index(timeseries), start, end)
+
+    def coverage(self, timeseries):
+        """
+        :return: time ranges of a timeseries held in the store as sorted, disjoint (start, end) tuples
+        :rtype: list
+        """
+        return self._read_index(timeseries)["coverage"]
+
+    def forget(self, timeseries, time_from=None, time_to=None):
+        """
+        mark a time range of a timeseries as not covered, so that it is fetched again by the next request;
+        called when data of the timeseries is added or deleted through this package.
+
+        :param time_from: first timestamp of the range; if None, from the first timestamp
+        :param time_to: last timestamp of the range; if None, up to the latest timestamp
+        """
+        start = _MIN if time_from is None else pd.Timestamp(time_from)
+        end = _MAX if time_to is None else pd.Timestamp(time_to)
+        if start.tzinfo is not None:
+            start = start.tz_convert("UTC").tz_localize(None)
+        if end.tzinfo is not None:
+            end = end.tz_convert("UTC").tz_localize(None)
+        # the bounds themselves have to leave the coverage as well
+        if start != _MIN:
+            start -= pd.Timedelta(1, "ns")
+        if end != _MAX:
+            end += pd.Timedelta(1, "ns")
+        with self._ts_lock(timeseries):
+            index = self._read_index(timeseries)
+            if index["coverage"]:
+                index["coverage"] = _subtract(index["coverage"], [(start, end)])
+                self._write_index(timeseries, index)
+
+    def clear(self, timeseries=None):
+        """
+        delete the stored data of a timeseries, or of all timeseries if None
+        """
+        if timeseries is not None:
+            with self._ts_lock(timeseries):
+                shutil.rmtree(self._directory(timeseries), ignore_errors=True)
+            return
+        with self._lock:
+            for path in self.path.glob("*/*"):
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+
+    def clear_dataset(self, id_dataset):
+        """
+        delete the stored data of all timeseries of a dataset
+        """
+        with self._lock:
+            shutil.rmtree(self.path / id_dataset, ignore_errors=True)
+
+    def _ts_lock(self, timeseries):
+        # one lock per timeseries, so that fetching one timeseries does not wait for the requests of others
+        with self._lock:
+            return self._ts_locks.setdefault((timeseries._id_ds, timeseries.id), threading.Lock())
+
+    def _directory(self, timeseries):
+        return self.path / timeseries._id_ds / timeseries.id
+
+    def _read_index(self, timeseries):
+        # coverage and part files of a timeseries; a part is [file, first timestamp, last timestamp, rows]
+        path = self._directory(timeseries) / "index.json"
+        if not path.exists():
+            return {"coverage": [], "parts": [], "next": 0}
+        with open(path) as file:
+            index = json.load(file)
+        index["coverage"] = [(pd.Timestamp(a), pd.Timestamp(b)) for a, b in index["coverage"]]
+        index["parts"] = [[name, pd.Timestamp(a), pd.Timestamp(b), rows] for name, a, b, rows in index["parts"]]
+        return index
+
+    def _write_index(self, timeseries, index):
+        content = {"coverage": [[a.isoformat(), b.isoformat()] for a, b in index["coverage"]],
+                   "parts": [[name, a.isoformat(), b.isoformat(), rows] for name, a, b, rows in index["parts"]],
+                   "next": index["next"]}
+        path = self._directory(timeseries) / "index.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w") as file:
+            json.dump(content, file)
+        os.replace(tmp, path)
+
+    def _load(self, timeseries, index, start, end):
+        directory = self._directory(timeseries)
+        schema_path = directory / "schema.{0}".format(self.format)
+        if not schema_path.exists():
+            return None
+        schema = self._read_frame(schema_path)
+        frames = [self._read_frame(directory / name) for name, a, b, _ in sorted(index["parts"], key=lambda p: p[1])
+                  if a <= end and b >= start]
+        if not frames:
+            return schema
+        data = frames[0] if len(frames) == 1 else pd.concat(frames)
+        data = data[_between(data.index, start, end)].sort_index()
+        # concatenating categoricals with different categories falls back to plain values
+        for column, dtype in schema.dtypes.items():
+            if isinstance(dtype, pd.CategoricalDtype) and not isinstance(data[column].dtype, pd.CategoricalDtype):
+                data[column] = data[column].astype("category")
+        return data
+
+    def _replace(self, timeseries, index, a, b, data):
+        # rows of older parts within the fetched range are superseded; only the parts overlapping it are rewritten
+        directory = self._directory(timeseries)
+        directory.mkdir(parents=True, exist_ok=True)
+        for part in [part for part in index["parts"] if part[1] <= b and part[2] >= a]:
+            old = self._read_frame(directory / part[0])
+            index["parts"].remove(part)
+            (directory / part[0]).unlink()
+            self._add_parts(timeseries, index, old[~_between(old.index, a, b)])
+        self._add_parts(timeseries, index, data)
+        self._write_frame(directory / "schema.{0}".format(self.format), data.iloc[:0])
+
+    def _add_parts(self, timeseries, index, data):
+        directory = self._directory(timeseries)
+        data = data.sort_index()
+        for i in range(0, len(data), self.part_rows):
+            chunk = data.iloc[i:i + self.part_rows]
+            name = "{0}.{1}".format(index["next"], self.format)
+            index["next"] += 1
+            self._write_frame(directory / name, chunk)
+            timestamps = _naive(chunk.index)
+            index["parts"].append([name, timestamps[0], timestamps[-1], len(chunk)])
+
+    def _compact(self, timeseries, index):
+        # successive syncs of the tail write small parts; neighbours are merged while they fit into one part, once
+        # there are enough of them that the rewrite pays off
+        directory = self._directory(timeseries)
+        groups = []
+        for part in sorted(index["parts"], key=lambda p: p[1]):
+            if groups and sum(p[3] for p in groups[-1]) + part[3] <= self.part_rows:
+                groups[-1].append(part)
+            else:
+                groups.append([part])
+        for group in groups:
+            if len(group) < _MERGE_PARTS:
+                continue
+            data = pd.concat([self._read_frame(directory / part[0]) for part in group])
+            for part in group:
+                index["parts"].remove(part)
+                (directory / part[0]).unlink()
+            self._add_parts(timeseries, index, data)
+
+    def _read_frame(self, path):
+        if self.format == "parquet":
+            return pd.read_parquet(path)
+        return pd.read_pickle(path)
+
+    def _write_frame(self, path, data):
+        tmp = path.with_name(path.name + ".tmp")
+        if self.format == "parquet":
+            data.to_parquet(tmp)
+        else:
+            data.to_pickle(tmp)
+        os.replace(tmp, path)
+
+
+def _naive(index):
+    # part ranges are kept as naive UTC timestamps like the coverage
+    if getattr(index, "tz", None) is not None:
+        return index.tz_convert("UTC").tz_localize(None)
+    return index
+
+
+def _between(index, start, end):
+    # inclusive range mask; aware indexes are compared in UTC like the naive bounds
+    index = _naive(index)
+    return (index >= start) & (index <= end)
+
+
+def _union(ranges):
+    merged = []
+    for a, b in sorted(ranges):
+        if merged and a <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], b))
+        else:
+            merged.append((a, b))
+    return merged
+
+
+def _subtract(ranges, removed):
+    # parts of ranges not within removed; boundaries of removed ranges stay covered on both sides
+    removed = _union(removed)
+    result = []
+    for a, b in ranges:
+        if a == b:
+            # a single timestamp is kept unless a removed range holds it
+            if not any(c <= a <= d for c, d in removed):
+                result.append((a, b))
+            continue
+        parts = [(a, b)]
+        for c, d in removed:
+            parts = [piece for x, y in parts
+                     for piece in ((x, min(y, c)), (max(x, d), y)) if piece[0] < piece[1]]
+        result.extend(parts)
+    return result
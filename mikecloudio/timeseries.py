@@ -1,83 +1,197 @@
-import json
+import copy
 import sys
+import tempfile
 import warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 # import matplotlib.pyplot as plt
 
 import pandas as pd
-import requests
+
+from mikecloudio.appender import AppenderHandle
+from mikecloudio.codec import check_columns, decode_stream, decode_values, encode_values
+from mikecloudio.transfer import write_csv
+from mikecloudio.transport import map_concurrent, validate_response
+from mikecloudio.upload import UploadJournal, chunk_key, iter_chunks, rows_per_chunk, upload_chunks
 
 
 class Timeseries:
 
-    def __init__(self, dataset, id_timeseries="", name_timeseries=""):
+    def __init__(self, dataset, id_timeseries="", name_timeseries="", lazy=False):
+        """
+        Read, write and delete the data of a timeseries in a MIKE CLOUD dataset.
+
+        :param dataset: dataset containing the timeseries
+        :type dataset: mikecloudio.Dataset
+        :param id_timeseries: timeseries ID
+        :type id_timeseries: str
+        :param name_timeseries: timeseries name
+        :type name_timeseries: str
+        :param lazy: if True, a missing name or id is not requested in the constructor but resolved on first access\\
+            of the name or id property, so creating the object sends no request
+        :type lazy: bool
+        """
         self.ds = dataset
-        self._id_ds = self.ds._id
         self._id_proj = self.ds.con.project_id
         self._id = id_timeseries
         self._name = name_timeseries
 
-        if id_timeseries == "" and name_timeseries != "":
-            self._id = self.ds.query_ts_id(name_timeseries)
-            self._name = name_timeseries
-
-        elif id_timeseries != "" and name_timeseries == "":
-            self._name = self.ds.query_ts_name(id_timeseries)
-            self._id = id_timeseries
-
         if self._name == "" and self._id == "":
             warnings.warn("neither timeseries id nor timerseries name were not defined (at least one value required).")
 
-        self._header = {'dhi-open-api-key': '{0}'.format(self.ds.con._api_key),
-                        'Content-Type': 'application/json',
-                        'dhi-project-id': '{0}'.format(self._id_proj),
-                        'dhi-dataset-id': '{0}'.format(self._id_ds),
-                        'dhi-service-id': 'timeseries',
-                        }
+        if not lazy:
+            self._id = self.id
+            self._name = self.name
 
-    def get_data(self, time_from=None, time_to=None):
+    @property
+    def id(self):
+        if self._id == "" and self._name != "":
+            self._id = self.ds.query_ts_id(self._name)
+        return self._id
+
+    @property
+    def name(self):
+        if self._name == "" and self._id != "":
+            self._name = self.ds.query_ts_name(self._id)
+        return self._name
+
+    @property
+    def _id_ds(self):
+        return self.ds.id
+
+    @property
+    def _header(self):
+        return self.ds._header
+
+    def get_data(self, time_from=None, time_to=None, window=None, max_workers=4, typed=False, stream=False):
         """
-        function to request data in timeseries
+        function to request data in timeseries.
+        If the connection has a local_store, typed and streamed requests are answered from it and only the
+        ranges it does not cover yet are requested.
 
         :param time_from: specify from what timestamp data is requested; format: yyyy-mm-ddThhmmss. If None, will return from first timestamp.
         :param time_to: specify to what timestamp data is requested; format: yyyy-mm-ddThhmmss. If None, will return up to latest timestamp.
+        :param window: split the range from time_from to time_to into windows that are requested concurrently\\
+            and joined in order. Either a window length understood by pandas, e.g. "30D" or a Timedelta,\\
+            or "auto" to split the range into two windows per worker. Requires time_from and time_to.\\
+            If None, the range is requested at once.
+        :type window: str or pd.Timedelta
+        :param max_workers: maximum number of windows requested at the same time
+        :type max_workers: int
+        :param typed: if True, return the timestamps as DatetimeIndex and every column in the dtype of its\\
+            dataType (float32 for Single, float64 for Double, categorical for Flag, ...) instead of a timestamp\\
+            column of strings and object columns
+        :type typed: bool
+        :param stream: if True, parse the response while it is received into preallocated typed arrays\\
+            instead of reading it completely first, which keeps peak memory close to the size of the result.\\
+            Returns the same dataframe as typed=True.
+        :type stream: bool
         :return: dataframe containing the timeseries data
         :rtype: pd.DataFrame
         """
-        url = None
-        if time_from is None and time_to is None:
-            url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values"\
-                .format(self._id_ds, self._id)
-        elif time_from is None and time_to is not None:
-            url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values?to={2}"\
-                .format(self._id_ds, self._id, time_to)
-        elif time_from is not None and time_to is None:
-            url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values?from={2}"\
-                .format(self._id_ds, self._id, time_from)
-        elif time_from is not None and time_to is not None:
-            url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values?from={2}&to={3}"\
-                .format(self._id_ds, self._id, time_from, time_to)
-        response = requests.get(url, headers=self._header)
-
-        if response.status_code > 300 and time_from is not None or response.status_code > 300 and time_to is not None:
-            raise ValueError("request failed - validate that times are given in format {yyyy-MM-ddTHHmmss}")
-
-        json_ = response.json()
-        if response.status_code > 300:
-            return json_
-        df = pd.DataFrame(json_["data"])
-        js = self.get_info()
-
-        columns = {0: "timestamp", 1: js["item"]["item"]}
-
-        for i in range(2, len(df.columns)):
-            columns[i] = js["dataFields"][i-2]["name"]
+        store = self.ds.con.local_store
+        if (typed or stream) and store is not None:
+            def fetch(a, b):
+                return self._request_typed(a, b, window if a is not None and b is not None else None, max_workers,
+                                           stream)
+            return store.get_data(self, time_from, time_to, fetch)
+
+        if typed or stream:
+            return self._request_typed(time_from, time_to, window, max_workers, stream)
+
+        if window is None:
+            rows = self._request_values(time_from, time_to)
+        else:
+            windows = split_time_range(time_from, time_to, window, max_workers)
+            parts = map_concurrent(lambda w: self._request_values(*w), windows, max_workers)
+            rows = join_windows(parts)
 
-        df.rename(columns=columns, inplace=True)
+        df = pd.DataFrame(rows)
+        name_columns(df, self.get_info())
 
         return df
 
-    def add_data(self, dataframe, columns=None):
+    def iter_data(self, time_from, time_to, window="30D", prefetch=1, stream=False):
+        """
+        iterate over the data of a timeseries window by window, for processing ranges that do not fit into memory.
+        The windows are yielded in time order as typed dataframes (see get_data with typed=True) while the next
+        prefetch windows are already requested in the background, so at most prefetch + 1 windows are held at once.
+        Windows without data are skipped.
+
+        Example::
+
+            for df in ts.iter_data("2000-01-01T000000", "2020-01-01T000000", window="365D"):
+                check(df)
+
+        :param time_from: start of the range; format: yyyy-mm-ddThhmmss
+        :param time_to: end of the range; format: yyyy-mm-ddThhmmss
+        :param window: window length understood by pandas, e.g. "30D" or a Timedelta
+        :type window: str or pd.Timedelta
+        :param prefetch: number of windows requested ahead of the one being processed; 0 disables prefetching
+        :type prefetch: int
+        :param stream: parse every window while it is received, see get_data
+        :type stream: bool
+        :return: generator of typed dataframes with timestamp index
+        :rtype: generator
+        """
+        windows = split_time_range(time_from, time_to, window)
+
+        def fetch(w):
+            return self.get_data(w[0], w[1], typed=True, stream=stream)
+
+        last = None
+        with ThreadPoolExecutor(max_workers=max(1, prefetch)) as executor:
+            pending = deque()
+            try:
+                for i, w in enumerate(windows):
+                    pending.append(executor.submit(fetch, w))
+                    last_window = i == len(windows) - 1
+                    while pending and (len(pending) > prefetch or last_window):
+                        df, last = _next_window(pending.popleft().result(), last)
+                        if len(df) > 0:
+                            yield df
+            finally:
+                # windows requested ahead are not needed if the caller stops early
+                for future in pending:
+                    future.cancel()
+
+    def _request_typed(self, time_from=None, time_to=None, window=None, max_workers=4, stream=False):
+        if stream:
+            if window is None:
+                return self._stream_values(time_from, time_to)
+            windows = split_time_range(time_from, time_to, window, max_workers)
+            df = pd.concat(map_concurrent(lambda w: self._stream_values(*w), windows, max_workers))
+            return df[~df.index.duplicated(keep="first")]
+
+        if window is None:
+            rows = self._request_values(time_from, time_to)
+        else:
+            windows = split_time_range(time_from, time_to, window, max_workers)
+            rows = join_windows(map_concurrent(lambda w: self._request_values(*w), windows, max_workers))
+        return decode_values(rows, self.get_info())
+
+    def _request_values(self, time_from=None, time_to=None):
+        url = self.ds.con.metadata_service_url + values_command(self._id_ds, self.id, time_from, time_to)
+        response = self.ds.con.transport.get(url, headers=self._header)
+
+        validate_response(response, "request failed - validate that times are given in format {yyyy-MM-ddTHHmmss}")
+
+        return response.json()["data"]
+
+    def _stream_values(self, time_from=None, time_to=None):
+        info = self.get_info()
+        url = self.ds.con.metadata_service_url + values_command(self._id_ds, self.id, time_from, time_to)
+        response = self.ds.con.transport.get(url, headers=self._header, stream=True)
+        try:
+            validate_response(response, "request failed - validate that times are given in format "
+                                        "{yyyy-MM-ddTHHmmss}")
+            return decode_stream(response.iter_content(1 << 16), info)
+        finally:
+            response.close()
+
+    def add_data(self, dataframe, columns=None, chunk_size=None, chunk_bytes=None, max_workers=1, encode_workers=1,
+                 progress=None, journal=None):
         """
         add data to Mike Cloud API in form of a dataframe
 
@@ -87,97 +201,194 @@ class Timeseries:
         :param columns: list of names of additional columns within the dataframe;
             list values must correspond to 1st: main value, 2-nth: dataFields order
         :type columns: list
+        :param chunk_size: maximum number of rows sent per request; if None and chunk_bytes is None,\\
+            all rows are sent in one request
+        :type chunk_size: int
+        :param chunk_bytes: approximate maximum size of a request body in bytes
+        :type chunk_bytes: int
+        :param max_workers: maximum number of chunks uploaded at the same time
+        :type max_workers: int
+        :param encode_workers: number of threads encoding chunks; encoding runs in a pipeline ahead of the uploads,\\
+            so the next chunks are encoded while the previous ones are sent
+        :type encode_workers: int
+        :param progress: called as progress(rows_done, rows_total) after every chunk
+        :type progress: callable
+        :param journal: path of a journal file (or an UploadJournal) recording acknowledged chunks;\\
+            chunks already in the journal are skipped, so an interrupted upload resumes where it stopped
+        :type journal: str or mikecloudio.upload.UploadJournal
         """
-        url = self.ds.con.metadata_service_url + "api/upload/{0}/timeseries/{1}/json".format(self._id_ds,
-                                                                                             self._id)
         if 0 in dataframe.index:
             raise ValueError("dataframe index must be set to timestamp")
 
-        list_values = []
-        list_cur = []
         js = self.get_info()
+        if columns:
+            dataframe = dataframe[list(columns)]
+        check_columns(list(dataframe.columns), js["dataFields"])
 
-        if not columns:
-            if len(dataframe.columns)-1 != len(js["dataFields"]):
-                raise ValueError("dataframe amount of columns must fit to dataFields defined in timeseries: "
-                                 "specify columns or adjust dataframe size (example: "
-                                 "2 dataFields are defined plus the main value -> dataframe must contain 3 columns.\n "
-                                 "Defined DataFields: \n{0}".format(js["dataFields"]))
-            for i in range(len(dataframe)):
-                list_cur.clear()
-                list_cur.append("{0}".format(dataframe.index[i]))
-                for j in range(len(dataframe.columns)):
-                    list_cur.append(dataframe.iloc[i][j])
-                    if j < len(dataframe.columns)-1:
-                        if js["dataFields"][j]["name"] != dataframe.columns[j+1]:
-                            warning = "make sure order of columns correspond to 1st: main value, 2-nth: " \
-                                      "dataFields order.\nDefined DataFields: \n{0}".format(js["dataFields"])
-                            warnings.warn(warning)
-
-                list_values.append(list_cur.copy())
+        def encode(chunk):
+            return encode_values(chunk, js["dataFields"], check=False)
 
-        else:
-            if len(columns)-1 != len(js["dataFields"]):
-                raise ValueError("Amount of columns must fit to dataFields defined in timeseries: "
-                                 "specify columns or adjust dataframe size (example: "
-                                 "2 dataFields are defined plus the main value -> 3 columns must be given).\n"
-                                 "Defined DataFields: \n{0}".format(js["dataFields"]))
-            for i in range(len(dataframe)):
-                list_cur.clear()
-                list_cur.append("{0}".format(dataframe.index[i]))
-                for j in range(len(columns)):
-                    list_cur.append(dataframe[columns[j]].iloc[i])
-                    if j < len(dataframe.columns)-1:
-                        if js["dataFields"][j]["name"] != dataframe.columns[j + 1]:
-                            warning = "make sure order of columns correspond to 1st: main value, 2-nth: " \
-                                      "dataFields order.\nDefined DataFields: \n{0}".format(js["dataFields"])
-                            warnings.warn(warning)
-                list_values.append(list_cur.copy())
-
-        dict_ = {"data": list_values
-                 }
-
-        body = json.dumps(dict_)
-        response = requests.post(url, headers=self._header, data=body)
-        if response.status_code < 300:
-            print("added {0} values to {1}".format(len(list_values), self._id))
-        elif response.status_code == 500:
-            raise ValueError("failed POST request: error source may be the amount of columns - must fit the amount of dataFields "
-                             "defined in the timeseries attribute ")
-        else:
-            raise ValueError("failed POST request.")
+        rows = rows_per_chunk(dataframe, encode, chunk_size, chunk_bytes)
+        if len(dataframe) > 0:
+            self._forget_stored(dataframe.index.min(), dataframe.index.max())
+        sent = self._upload_chunks(iter_chunks(dataframe, rows), len(dataframe), encode, max_workers, encode_workers,
+                                   progress, journal)
+        print("added {0} values to {1}".format(sent, self.id))
 
-    def add_csv(self, path, columns=None):
+    def appender(self, **kwargs):
+        """
+        buffered appender for live data: rows are collected in the ingest queue of the connection and uploaded
+        in the background once enough rows or enough time accumulated, on flush() and at interpreter exit.
+
+        Example::
+
+            app = ts.appender(max_rows=500, max_age=2.0)
+            app.append("2021-01-01T00:00:00", 1.5)
+            app.append(dataframe)
+            app.flush()
+
+        :param kwargs: passed to mikecloudio.appender.Appender if the ingest queue does not exist yet; must match\
+            its settings otherwise, see Connection.ingest_queue
+        :return: appender bound to this timeseries
+        :rtype: mikecloudio.appender.AppenderHandle
+        """
+        return AppenderHandle(self.ds.con.ingest_queue(**kwargs), self)
+
+    def _upload_chunks(self, chunks, total_rows, encode, max_workers=1, encode_workers=1, progress=None,
+                       journal=None):
+        if journal is not None and not isinstance(journal, UploadJournal):
+            journal = UploadJournal(journal)
+
+        # the timeseries id keeps a journal shared by several timeseries from skipping chunks of the others
+        return upload_chunks(encode, self._post_values, chunks, total_rows, max_workers=max_workers,
+                             encode_workers=encode_workers, progress=progress, journal=journal,
+                             key=lambda chunk: "{0}|{1}".format(self.id, chunk_key(chunk)))
+
+    def _post_values(self, body):
+        url = self.ds.con.metadata_service_url + "api/upload/{0}/timeseries/{1}/json".format(self._id_ds,
+                                                                                             self.id)
+        # uploading the same values again overwrites them, so the request is safe to retry
+        response = self.ds.con.transport.post(url, headers=self._header, data=body, idempotent=True)
+        if response.status_code == 500:
+            validate_response(response, "failed POST request: error source may be the amount of columns - must fit "
+                                        "the amount of dataFields defined in the timeseries attribute ")
+        validate_response(response, "failed POST request.")
+
+    def add_csv(self, path, columns=None, chunk_size=100000, max_workers=1, encode_workers=1, progress=None,
+                journal=None):
         """
         add data in form of a csv-file. Format required:
         1st column: timestamp, 2nd: main value, 3rd - nth: additional values according to defined dataFields
-        in timeseries
+        in timeseries.
+        The file is read and uploaded in chunks of chunk_size rows, so memory use does not depend on its size.
 
         :param path: path of csv-file
         :type path: str
         :param columns: optional to define which columns to be added. Format:\\
             [<main value>, <additional values according to dataFields>, <additional values according to dataFields>, ...]
         :type columns: list
+        :param chunk_size: number of rows read and sent per request
+        :type chunk_size: int
+        :param max_workers: maximum number of chunks uploaded at the same time
+        :type max_workers: int
+        :param encode_workers: number of threads encoding chunks ahead of the uploads
+        :type encode_workers: int
+        :param progress: called as progress(rows_done, None) after every chunk; the total is not known in advance
+        :type progress: callable
+        :param journal: path of a journal file (or an UploadJournal) to resume an interrupted upload; see add_data
+        :type journal: str or mikecloudio.upload.UploadJournal
         """
         path = Path(path)
-        df = pd.read_csv(path)
-        df.set_index(df.columns[0], inplace=True)
-        self.add_data(df, columns=columns)
+        js = self.get_info()
+        names = list(columns) if columns else list(pd.read_csv(path, index_col=0, nrows=0).columns)
+        check_columns(names, js["dataFields"])
 
-    def get_info(self):
+        def chunks():
+            for chunk in pd.read_csv(path, index_col=0, chunksize=chunk_size):
+                yield chunk[names]
+
+        def encode(chunk):
+            return encode_values(chunk, js["dataFields"], check=False)
+
+        self._forget_stored()
+        sent = self._upload_chunks(chunks(), None, encode, max_workers, encode_workers, progress, journal)
+        print("added {0} values to {1}".format(sent, self.id))
+
+    def import_data(self, data, columns=None, reader_name="CsvTimeSeriesReader", writer_name="TimeSeriesWriter",
+                    wait=True, poll_interval=5.0, timeout=None, tmp_dir=None):
         """
-        get detailled information about timeseries
+        bulk import data through the transfer service: the data is written to a local csv-file, uploaded in one
+        streamed request and imported on the server, bypassing the JSON values endpoint. Meant for initial loads
+        of very large histories; use add_data for regular appends.
 
-        :return: a dictionary with the information
+        :param data: dataframe with timestamp index, or path of a csv-file in the format of add_csv
+        :type data: pd.DataFrame or str
+        :param columns: names of the dataframe columns to import; 1st: main value, 2-nth: dataFields order
+        :type columns: list
+        :param reader_name: reader of the conversion service for the csv-file
+        :type reader_name: str
+        :param writer_name: writer of the conversion service writing into the timeseries
+        :type writer_name: str
+        :param wait: if True, block until the import finished
+        :type wait: bool
+        :param poll_interval: seconds between two status requests
+        :type poll_interval: float
+        :param timeout: maximum seconds to wait for the import; None waits until it finished
+        :type timeout: float
+        :param tmp_dir: directory of the temporary csv-file written for a dataframe
+        :type tmp_dir: str
+        :return: status of the import
         :rtype: dict
         """
-        url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}".format(self._id_ds, self._id)
-        response = requests.get(url, headers=self._header)
-        if response.status_code >= 300:
-            raise ValueError("GET request failed")
+        writer_parameters = [{"name": "DatasetId", "value": self._id_ds},
+                             {"name": "TimeSeriesId", "value": self.id}]
+        self._forget_stored()
+        if isinstance(data, (str, Path)):
+            return self.ds.con.import_file(data, reader_name, writer_name, writer_parameters=writer_parameters,
+                                           wait=wait, poll_interval=poll_interval, timeout=timeout)
+
+        if 0 in data.index:
+            raise ValueError("dataframe index must be set to timestamp")
+        with tempfile.TemporaryDirectory(dir=tmp_dir) as directory:
+            path = write_csv(data, Path(directory) / "{0}.csv".format(self.id), self.get_info()["dataFields"],
+                             columns)
+            status = self.ds.con.import_file(path, reader_name, writer_name, writer_parameters=writer_parameters,
+                                             wait=wait, poll_interval=poll_interval, timeout=timeout)
+        return status
+
+    def get_info(self, refresh=False):
+        """
+        get detailled information about timeseries.
+        The result is kept in the metadata cache of the connection, so repeated calls within its TTL
+        do not send a request.
+
+        :param refresh: set to True to bypass the cache and request the information again
+        :type refresh: bool
+        :return: a dictionary with the information; a copy of the cached one
+        :rtype: dict
+        """
+        cache = self.ds.con.metadata_cache
+        key = ("ts", self._id_ds, self.id)
+        dict_ = None if refresh else cache.get(key)
+        if dict_ is None:
+            url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}".format(self._id_ds, self.id)
+            response = self.ds.con.transport.get(url, headers=self._header)
+            validate_response(response, "GET request failed")
+            dict_ = response.json()
+            cache.set(key, dict_)
+        # a copy, so that changes of the caller do not end up in the cache
+        return copy.deepcopy(dict_)
+
+    def invalidate_info(self):
+        """
+        remove the cached information of the timeseries so that the next get_info() requests it again
+        """
+        self.ds.con.metadata_cache.invalidate(("ts", self._id_ds, self.id))
 
-        dict_ = response.json()
-        return dict_
+    def _forget_stored(self, time_from=None, time_to=None):
+        # data changed on the service has to be fetched again by the local store of the connection
+        if self.ds.con.local_store is not None:
+            self.ds.con.local_store.forget(self, time_from, time_to)
 
     def plot(self, time_from=None, time_to=None, columns=None):
         """
@@ -217,25 +428,35 @@ class Timeseries:
             if not isinstance(columns, list):
                 raise ValueError("columns parameter must be a list")
             for i in range(len(columns)):
-                df_data[columns[i]].plot(kind="line", ax=ax, title=self._name, legend=True)
+                df_data[columns[i]].plot(kind="line", ax=ax, title=self.name, legend=True)
         else:
-            df_data.plot(kind='line', ax=ax, title=self._name, legend=True)
+            df_data.plot(kind='line', ax=ax, title=self.name, legend=True)
         plt.legend(loc='upper left', bbox_to_anchor=(1.0, 0.5))
         plt.close(fig)
         return fig
 
-    def del_ts(self):
+    def del_ts(self, confirm=None):
         """
         function to delete corresponding timeseries of the timeseries instance
+
+        :param confirm: True deletes without asking, False does nothing; if None, the user is asked on the console
+        :type confirm: bool
         """
-        confirm = query_yes_no("Are you sure you want to delete " + self._id + " ?")
+        if confirm is None:
+            confirm = query_yes_no("Are you sure you want to delete " + self.id + " ?")
         if confirm is True:
-            url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}".format(self._id_ds, self._id)
-            response = requests.delete(url, headers=self._header)
-            if response.status_code >= 300:
-                raise ValueError("deletion request failed")
-
-    def del_data(self, time_from=None, time_to=None):
+            self._delete()
+
+    def _delete(self):
+        url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}".format(self._id_ds, self.id)
+        response = self.ds.con.transport.delete(url, headers=self._header)
+        validate_response(response, "deletion request failed")
+        self.invalidate_info()
+        self.ds.invalidate_ts_index()
+        if self.ds.con.local_store is not None:
+            self.ds.con.local_store.clear(self)
+
+    def del_data(self, time_from=None, time_to=None, confirm=None):
         """
         function to delete data from timeseries; if no 'to' time defined will delete all values to latest timestep
 
@@ -243,35 +464,140 @@ class Timeseries:
             If None, will delete all data from first timestamp.
         :param time_to: specify to what timestamp data is deleted; format: yyyy-mm-ddThhmmss.\\
             If None, will return up to latest timestamp.
+        :param confirm: True deletes without asking, False does nothing; if None, the user is asked on the console
+        :type confirm: bool
         :return:
         """
-        if time_to is None and time_from is not None:
-            confirm = query_yes_no("Are you sure you want to delete all data from " + time_from + " in timeseries " + self._name + " ?")
-            if confirm is True:
-                url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values?from={2}" \
-                    .format(self._id_ds, self._id, time_from)
+        if confirm is None:
+            if time_to is None and time_from is not None:
+                question = "Are you sure you want to delete all data from " + time_from + " in timeseries " + \
+                           self.name + " ?"
+            elif time_from is None and time_to is not None:
+                question = "Are you sure you want to delete all data until " + time_to + " in timeseries " + \
+                           self.name + " ?"
+            elif time_from is None and time_to is None:
+                question = "Are you sure you want to delete all data in timeseries " + self.name + " ?"
+            else:
+                question = "Are you sure you want to delete all data from " + time_from + " to " + time_to + \
+                           " in timeseries " + self.name + " ?"
+            confirm = query_yes_no(question)
+        if confirm is True:
+            self._delete_data(time_from, time_to)
 
-        elif time_from is None and time_to is not None:
-            confirm = query_yes_no("Are you sure you want to delete all data until " + time_to + " in timeseries " + self._name + " ?")
-            if confirm is True:
-                url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values?to={2}" \
-                    .format(self._id_ds, self._id, time_to)
+    def _delete_data(self, time_from=None, time_to=None):
+        url = self.ds.con.metadata_service_url + values_command(self._id_ds, self.id, time_from, time_to)
+        response = self.ds.con.transport.delete(url, headers=self._header)
+        validate_response(response, "request failed. make sure times are in format {yyyy-MM-ddTHHmmss}")
+        self._forget_stored(time_from, time_to)
 
-        elif time_from is None and time_to is None:
-            confirm = query_yes_no("Are you sure you want to delete all data in timeseries " + self._name + " ?")
-            if confirm is True:
-                url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values" \
-                    .format(self._id_ds, self._id)
 
-        else:
-            confirm = query_yes_no("Are you sure you want to delete all data from " + time_from + " to " + time_to + " in timeseries " + self._name + " ?")
-            if confirm is True:
-                url = self.ds.con.metadata_service_url + "api/ts/{0}/timeseries/{1}/values?from={2}&to={3}" \
-                    .format(self._id_ds, self._id, time_from, time_to)
-
-        response = requests.delete(url, headers=self._header)
-        if response.status_code > 300:
-            raise ValueError("request failed. make sure times are in format {yyyy-MM-ddTHHmmss}")
+def values_command(id_dataset, id_timeseries, time_from=None, time_to=None):
+    """
+    build the command of the values endpoint of a timeseries
+
+    :param id_dataset: dataset ID
+    :param id_timeseries: timeseries ID
+    :param time_from: first timestamp; format: yyyy-mm-ddThhmmss. If None, no lower bound is set.
+    :param time_to: last timestamp; format: yyyy-mm-ddThhmmss. If None, no upper bound is set.
+    :return: command relative to the metadata service url
+    :rtype: str
+    """
+    command = "api/ts/{0}/timeseries/{1}/values".format(id_dataset, id_timeseries)
+    query = []
+    if time_from is not None:
+        query.append("from={0}".format(time_from))
+    if time_to is not None:
+        query.append("to={0}".format(time_to))
+    if query:
+        command += "?" + "&".join(query)
+
+    return command
+
+
+def split_time_range(time_from, time_to, window, max_workers=4):
+    """
+    split a time range into consecutive windows; neighbouring windows share their boundary timestamp
+
+    :param time_from: start of the range, e.g. "2020-01-01T000000"
+    :param time_to: end of the range
+    :param window: window length understood by pandas, e.g. "30D", or "auto" for two windows per worker,\
+        rounded up to whole seconds
+    :type window: str or pd.Timedelta
+    :param max_workers: number of workers used to size "auto" windows
+    :type max_workers: int
+    :return: list of (time_from, time_to) tuples in format yyyy-mm-ddThhmmss
+    :rtype: list
+    """
+    if time_from is None or time_to is None:
+        raise ValueError("time_from and time_to are required to request data in windows")
+
+    start = pd.Timestamp(time_from)
+    end = pd.Timestamp(time_to)
+    if end <= start:
+        raise ValueError("time_to must be later than time_from")
+
+    if isinstance(window, str) and window == "auto":
+        # the service takes whole seconds, so shorter windows would collapse to empty ones
+        window = max(((end - start) / max(1, 2 * max_workers)).ceil("s"), pd.Timedelta(1, "s"))
+    window = pd.Timedelta(window)
+    if window <= pd.Timedelta(0):
+        raise ValueError("window must be a positive duration")
+
+    bounds = list(pd.date_range(start, end, freq=window))
+    if bounds[-1] != end:
+        bounds.append(end)
+
+    fmt = "%Y-%m-%dT%H%M%S"
+    windows = [(a.strftime(fmt), b.strftime(fmt)) for a, b in zip(bounds[:-1], bounds[1:])]
+    # windows shorter than a second can start and end at the same formatted timestamp
+    return [(a, b) for a, b in windows if a != b]
+
+
+def join_windows(parts):
+    """
+    concatenate the rows of consecutive windows, dropping rows repeated at a shared window boundary
+
+    :param parts: rows per window in time order
+    :type parts: list
+    :return: rows
+    :rtype: list
+    """
+    rows = []
+    for part in parts:
+        start = 0
+        if rows:
+            last = rows[-1][0]
+            while start < len(part) and part[start][0] == last:
+                start += 1
+        rows.extend(part[start:])
+
+    return rows
+
+
+def _next_window(df, last):
+    # drop the rows repeated at the boundary shared with the previous window
+    if last is not None and len(df) > 0:
+        df = df[df.index > last]
+    if len(df) > 0:
+        last = df.index[-1]
+    return df, last
+
+
+def name_columns(df, info):
+    """
+    rename the columns of a values dataframe in place: timestamp, main item, then the dataFields names
+
+    :param df: dataframe as returned by the values endpoint with integer column labels
+    :type df: pd.DataFrame
+    :param info: timeseries details as returned by Timeseries.get_info()
+    :type info: dict
+    """
+    columns = {0: "timestamp", 1: info["item"]["item"]}
+
+    for i in range(2, len(df.columns)):
+        columns[i] = info["dataFields"][i-2]["name"]
+
+    df.rename(columns=columns, inplace=True)
 
 
 def query_yes_no(question, default="yes"):
@@ -0,0 +1,96 @@
+import time
+from pathlib import Path
+
+from mikecloudio.codec import check_columns, format_timestamps
+from mikecloudio.exceptions import RequestFailedError
+from mikecloudio.transport import validate_response
+
+# endpoints of the conversion service that imports uploaded files
+IMPORT_COMMAND = "api/conversion/transfer/upload-convert"
+STATUS_COMMAND = "api/conversion/transfer/{0}"
+
+FINAL_STATES = ("Completed", "Error")
+
+
+def write_csv(dataframe, path, data_fields=None, columns=None, chunk_size=1000000):
+    """
+    write a dataframe with timestamp index as import file: 1st column timestamp, 2nd main value,
+    3rd - nth data fields. Rows are written in chunks so no full text copy of the dataframe is built.
+
+    :param dataframe: dataframe containing data with timestamp as index
+    :type dataframe: pd.DataFrame
+    :param path: path of the csv-file to write
+    :type path: str or pathlib.Path
+    :param data_fields: dataFields of the timeseries; if given, the columns are checked against them
+    :type data_fields: list
+    :param columns: names of the columns to write; 1st: main value, 2-nth: dataFields order
+    :type columns: list
+    :param chunk_size: number of rows formatted at once
+    :type chunk_size: int
+    :return: path of the written file
+    :rtype: pathlib.Path
+    """
+    path = Path(path)
+    if columns:
+        dataframe = dataframe[list(columns)]
+    if data_fields is not None:
+        check_columns(list(dataframe.columns), data_fields)
+
+    with open(path, "w", newline="") as file:
+        for start in range(0, max(len(dataframe), 1), chunk_size):
+            chunk = dataframe.iloc[start:start + chunk_size]
+            chunk = chunk.set_axis(format_timestamps(chunk.index), axis=0)
+            chunk.to_csv(file, header=start == 0, index_label="timestamp")
+
+    return path
+
+
+def upload_file(transport, upload_url, path, content_type="text/csv"):
+    """
+    upload a file in one streamed PUT request to a transfer upload url (an Azure blob SAS url).
+    The file is read while it is sent, so it is never loaded into memory.
+
+    :param transport: transport of the connection
+    :type transport: mikecloudio.transport.Transport
+    :param upload_url: url returned by Connection.request_upload_url()
+    :type upload_url: str
+    :param path: path of the file
+    :type path: str or pathlib.Path
+    :param content_type: content type of the file
+    :type content_type: str
+    """
+    headers = {"x-ms-blob-type": "BlockBlob", "Content-Type": content_type}
+    with open(path, "rb") as file:
+        # a partly consumed file cannot be sent again, so the request is not retried by the transport
+        response = transport.put(upload_url, headers=headers, data=file, idempotent=False)
+    validate_response(response, "file upload to transfer url failed")
+
+
+def wait_for_transfer(connection, transfer_id, poll_interval=5.0, timeout=None):
+    """
+    poll the status of a server-side import until it is completed or failed
+
+    :param connection: connection that started the import
+    :type connection: mikecloudio.Connection
+    :param transfer_id: id of the import
+    :type transfer_id: str
+    :param poll_interval: seconds between two status requests
+    :type poll_interval: float
+    :param timeout: maximum seconds to wait; None waits until the import finished
+    :type timeout: float
+    :return: final status of the import
+    :rtype: dict
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        status = connection.request(STATUS_COMMAND.format(transfer_id), json_key=None)
+        if status.get("status") in FINAL_STATES:
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("import {0} did not finish within {1} seconds, last status: {2}"
+                               .format(transfer_id, timeout, status.get("status")))
+        time.sleep(poll_interval)
+
+    if status.get("status") == "Error":
+        raise RequestFailedError("import {0} failed: {1}".format(transfer_id, status.get("errorMessage", status)))
+    return status
@@ -0,0 +1,370 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from mikecloudio.exceptions import (AuthorizationError, CircuitOpenError, NotFoundError, RequestFailedError,
+                                    ServiceUnavailableError, ThrottledError)
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+# statuses telling that the service itself failed; a 500 usually answers an invalid request instead
+SERVICE_FAILURE_STATUSES = frozenset([502, 503, 504])
+
+
+def parse_retry_after(response):
+    """
+    read the Retry-After header of a response
+
+    :param response: response of the service
+    :type response: requests.Response
+    :return: seconds to wait, or None if the header is missing or invalid
+    :rtype: float
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def validate_response(response, message=None):
+    """
+    raise a typed MikeCloudError if the response is not successful
+
+    :param response: response of the service
+    :type response: requests.Response
+    :param message: error message to use instead of the default one
+    :type message: str
+    """
+    status = response.status_code
+    if status < 300:
+        return
+
+    if status in (401, 403):
+        raise AuthorizationError(message or "Not authorized to make this request.", response)
+    if status == 404:
+        raise NotFoundError(message or "Request failed: resource not found.", response)
+    if status == 429:
+        raise ThrottledError(message or "Request failed: too many requests.", response,
+                             retry_after=parse_retry_after(response))
+    if status > 500:
+        raise ServiceUnavailableError(message or "Request failed: service error {0}.".format(status), response)
+
+    raise RequestFailedError(message or "Request failed: Check api key.", response)
+
+
+class RetryPolicy:
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=30.0, jitter=True,
+                 retry_statuses=(429, 502, 503, 504), methods=IDEMPOTENT_METHODS):
+        """
+        Decide whether and when a failed request is retried.
+        Waits grow exponentially (backoff_factor * 2 ** attempt, capped at max_backoff) and are
+        randomized with full jitter. A Retry-After header on 429 and 503 responses takes precedence.
+
+        :param max_retries: number of retries after the first attempt; 0 disables retrying
+        :type max_retries: int
+        :param backoff_factor: base wait in seconds
+        :type backoff_factor: float
+        :param max_backoff: upper bound of a single wait in seconds
+        :type max_backoff: float
+        :param jitter: if True, wait a random time between 0 and the exponential backoff
+        :type jitter: bool
+        :param retry_statuses: response status codes that are retried; 500 is not retried by default because the\
+            service answers invalid requests, e.g. columns not fitting the dataFields, with it
+        :type retry_statuses: tuple
+        :param methods: HTTP methods that are safe to retry
+        :type methods: frozenset
+        """
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.retry_statuses = frozenset(retry_statuses)
+        self.methods = frozenset(m.upper() for m in methods)
+
+    def is_retryable(self, method):
+        return method.upper() in self.methods
+
+    def backoff(self, attempt, response=None):
+        """
+        seconds to wait before the next attempt
+
+        :param attempt: number of the failed attempt, starting at 0
+        :type attempt: int
+        :param response: failed response, if any
+        :type response: requests.Response
+        :return: seconds to wait
+        :rtype: float
+        """
+        if response is not None and response.status_code in (429, 503):
+            retry_after = parse_retry_after(response)
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff)
+
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
+
+
+class CircuitBreaker:
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0):
+        """
+        Fail fast while the service is down.
+        After failure_threshold consecutive failures (502, 503 and 504 responses, connection errors or timeouts)
+        the circuit opens and requests raise CircuitOpenError without being sent. After recovery_timeout seconds
+        a single trial request is let through; its success closes the circuit, its failure opens it again.
+
+        :param failure_threshold: consecutive failures that open the circuit
+        :type failure_threshold: int
+        :param recovery_timeout: seconds to wait before a trial request
+        :type recovery_timeout: float
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return "half-open"
+            return "open"
+
+    def before_request(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.recovery_timeout or self._trial_running:
+                raise CircuitOpenError("Request not sent: service failed {0} times in a row, circuit is open."
+                                       .format(self._failures))
+            self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release_trial(self):
+        """
+        let another trial request through after one ended without a response or a connection failure, e.g. on an
+        invalid request or an interrupt; the state of the circuit is left as it is
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def reset(self):
+        self.record_success()
+
+
+class RateLimiter:
+
+    def __init__(self, rate, burst=None):
+        """
+        Thread-safe token bucket limiting how many requests are started per second.
+        The bucket holds up to burst tokens and refills at rate tokens per second; every request takes one token
+        and waits while the bucket is empty.
+
+        :param rate: sustained number of requests per second
+        :type rate: float
+        :param burst: number of requests that may be started at once after an idle period; defaults to 1
+        :type burst: int
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = burst if burst is not None else 1
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        take a token, waiting until one is available
+        """
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def map_concurrent(func, items, max_workers=4):
+    """
+    call func for every item in a thread pool and return the results in the order of items.
+    Meant for I/O bound calls sharing the pooled session of a connection; keep max_workers at or below
+    the pool_maxsize of the connection to reuse its kept-alive connections.
+
+    :param func: function taking one item
+    :type func: callable
+    :param items: items to process
+    :type items: iterable
+    :param max_workers: maximum number of calls running at the same time
+    :type max_workers: int
+    :return: results in the order of items; the first exception raised by func is re-raised
+    :rtype: list
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True):
+    """
+    create a requests session backed by a pooled connection adapter
+
+    :param pool_connections: number of per-host connection pools to keep
+    :type pool_connections: int
+    :param pool_maxsize: maximum number of connections kept alive per host
+    :type pool_maxsize: int
+    :param pool_block: if True, block when all connections of a host are in use instead of opening a new one
+    :type pool_block: bool
+    :param keep_alive: if False, connections are closed after every request
+    :type keep_alive: bool
+    :return: configured session
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+class Transport:
+
+    def __init__(self, session=None, timeout=(3.05, 60), pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, retry_policy=None, circuit_breaker=None):
+        """
+        Send HTTP requests to MIKE CLOUD over a shared, pooled session,
+        retrying transient failures and failing fast while the service is down.
+
+        :param session: existing session to use; if None a pooled session is created
+        :type session: requests.Session
+        :param timeout: default timeout in seconds, either a single value or a (connect, read) tuple
+        :type timeout: float or tuple
+        :param pool_connections: number of per-host connection pools to keep
+        :type pool_connections: int
+        :param pool_maxsize: maximum number of connections kept alive per host
+        :type pool_maxsize: int
+        :param pool_block: if True, block when all connections of a host are in use
+        :type pool_block: bool
+        :param keep_alive: if False, connections are closed after every request
+        :type keep_alive: bool
+        :param retry_policy: retry policy; if None the default RetryPolicy is used
+        :type retry_policy: RetryPolicy
+        :param circuit_breaker: circuit breaker; if None the default CircuitBreaker is used
+        :type circuit_breaker: CircuitBreaker
+        """
+        if session is None:
+            session = create_session(pool_connections, pool_maxsize, pool_block, keep_alive)
+        if retry_policy is None:
+            retry_policy = RetryPolicy()
+        if circuit_breaker is None:
+            circuit_breaker = CircuitBreaker()
+        self.session = session
+        self.timeout = timeout
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+
+    def send(self, method, url, idempotent=None, **kwargs):
+        """
+        send a request through the pooled session.
+        Idempotent requests failing with a retryable status, a connection error or a timeout are retried
+        according to the retry policy. The last response is returned and must be checked by the caller.
+
+        :param method: HTTP method, e.g. "GET"
+        :type method: str
+        :param url: full request url
+        :type url: str
+        :param idempotent: set to True to allow retrying a request whose method is not idempotent, e.g. a POST \\
+            that can safely be repeated; if None it is derived from the method
+        :type idempotent: bool
+        :param kwargs: passed on to requests.Session.request
+        :return: response
+        :rtype: requests.Response
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        policy = self.retry_policy
+        if idempotent is None:
+            idempotent = policy.is_retryable(method)
+        retries = policy.max_retries if idempotent else 0
+
+        attempt = 0
+        while True:
+            self.circuit_breaker.before_request()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.circuit_breaker.record_failure()
+                if attempt >= retries:
+                    raise ServiceUnavailableError("Request failed: {0}".format(e)) from e
+                time.sleep(policy.backoff(attempt))
+                attempt += 1
+                continue
+            except BaseException:
+                self.circuit_breaker.release_trial()
+                raise
+
+            if response.status_code in SERVICE_FAILURE_STATUSES:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+
+            if response.status_code not in policy.retry_statuses or attempt >= retries:
+                return response
+            time.sleep(policy.backoff(attempt, response))
+            response.close()
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.send("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.send("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.send("PUT", url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.send("DELETE", url, **kwargs)
+
+    def close(self):
+        self.session.close()
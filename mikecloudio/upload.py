@@ -0,0 +1,223 @@
+import json
+import queue
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+
+def rows_per_chunk(dataframe, encode, chunk_size=None, chunk_bytes=None, sample_rows=1000):
+    """
+    number of rows per upload chunk from a row limit and/or a byte limit.
+    The byte limit is translated into rows from the encoded size of a sample of the dataframe.
+
+    :param dataframe: dataframe to upload
+    :type dataframe: pd.DataFrame
+    :param encode: function encoding a dataframe into the request body
+    :type encode: callable
+    :param chunk_size: maximum number of rows per chunk
+    :type chunk_size: int
+    :param chunk_bytes: approximate maximum size of a request body in bytes
+    :type chunk_bytes: int
+    :param sample_rows: number of rows encoded to estimate the size of a row
+    :type sample_rows: int
+    :return: rows per chunk, at least 1
+    :rtype: int
+    """
+    rows = len(dataframe) if chunk_size is None else chunk_size
+    if chunk_bytes is not None and len(dataframe) > 0:
+        sample = dataframe.iloc[:sample_rows]
+        bytes_per_row = len(encode(sample)) / len(sample)
+        rows = min(rows, int(chunk_bytes // bytes_per_row))
+
+    return max(1, rows)
+
+
+def iter_chunks(dataframe, rows):
+    """
+    split a dataframe into consecutive chunks of at most rows rows (views, not copies)
+    """
+    for start in range(0, len(dataframe), rows):
+        yield dataframe.iloc[start:start + rows]
+
+
+def chunk_key(chunk):
+    """
+    key identifying a chunk in an UploadJournal: its first and last timestamp, length and a content hash
+    """
+    if len(chunk) == 0:
+        return "empty"
+    content = int(pd.util.hash_pandas_object(chunk).sum()) & 0xFFFFFFFFFFFFFFFF
+    return "{0}|{1}|{2}|{3:016x}".format(chunk.index[0], chunk.index[-1], len(chunk), content)
+
+
+class UploadJournal:
+
+    def __init__(self, path):
+        """
+        Local file recording the chunks of an upload the service acknowledged.
+        Running the same upload again with the same journal skips these chunks, so an interrupted upload resumes
+        where it stopped. The journal is kept after a complete upload; delete it to upload the data again.
+
+        :param path: path of the journal file; created if it does not exist
+        :type path: str or pathlib.Path
+        """
+        self.path = Path(path)
+        self._keys = set()
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path) as file:
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        self._keys.add(json.loads(line)["key"])
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def acknowledge(self, key, rows=None):
+        """
+        record a chunk as uploaded; the entry is flushed to disk immediately
+        """
+        with self._lock:
+            if key in self._keys:
+                return
+            with open(self.path, "a") as file:
+                file.write(json.dumps({"key": key, "rows": rows}) + "\n")
+                file.flush()
+            self._keys.add(key)
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            if self.path.exists():
+                self.path.unlink()
+
+
+def upload_chunks(encode, send, chunks, total_rows, max_workers=1, encode_workers=1, queue_size=None, progress=None,
+                  journal=None, key=chunk_key, size=len):
+    """
+    upload chunks through a producer/consumer pipeline: encode_workers threads encode chunks into request bodies
+    while max_workers threads send already encoded bodies, connected by a bounded queue. Encoding of the next chunks
+    thus overlaps with the network transfer of the previous ones, and at most queue_size encoded bodies wait in memory.
+    Chunks found in the journal are skipped; every sent chunk is acknowledged in it. After the first failure no
+    further chunks are started, the running ones are finished and the error is raised.
+
+    :param encode: function encoding one chunk into a request body
+    :type encode: callable
+    :param send: function sending one request body
+    :type send: callable
+    :param chunks: chunks to upload
+    :type chunks: iterable
+    :param total_rows: total number of rows, passed to progress; None if it is not known in advance
+    :type total_rows: int
+    :param max_workers: number of threads sending requests
+    :type max_workers: int
+    :param encode_workers: number of threads encoding chunks
+    :type encode_workers: int
+    :param queue_size: maximum number of encoded bodies waiting to be sent; defaults to 2 * max_workers
+    :type queue_size: int
+    :param progress: called as progress(rows_done, total_rows) after every finished or skipped chunk
+    :type progress: callable
+    :param journal: journal of acknowledged chunks
+    :type journal: UploadJournal
+    :param key: function returning the journal key of a chunk
+    :type key: callable
+    :param size: function returning the number of rows of a chunk
+    :type size: callable
+    :return: number of rows sent, excluding skipped chunks
+    :rtype: int
+    """
+    max_workers = max(1, max_workers)
+    encode_workers = max(1, encode_workers)
+    if queue_size is None:
+        queue_size = 2 * max_workers
+    chunk_queue = queue.Queue(maxsize=2 * encode_workers)
+    body_queue = queue.Queue(maxsize=max(1, queue_size))
+    failed = threading.Event()
+    errors = []
+    state = {"done": 0, "sent": 0}
+    lock = threading.Lock()
+
+    def finished(rows, sent):
+        with lock:
+            state["done"] += rows
+            state["sent"] += rows if sent else 0
+            done = state["done"]
+        if progress is not None:
+            progress(done, total_rows)
+
+    def fail(error):
+        with lock:
+            errors.append(error)
+        failed.set()
+
+    def worker(source, handle):
+        while not failed.is_set():
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _DONE:
+                return
+            try:
+                handle(*item)
+            except Exception as e:
+                fail(e)
+
+    def encode_item(chunk, chunk_id):
+        _put(body_queue, (encode(chunk), chunk_id, size(chunk)), failed)
+
+    def send_item(body, chunk_id, rows):
+        send(body)
+        if journal is not None:
+            journal.acknowledge(chunk_id, rows)
+        finished(rows, True)
+
+    encoders = [threading.Thread(target=worker, args=(chunk_queue, encode_item), daemon=True)
+                for _ in range(encode_workers)]
+    senders = [threading.Thread(target=worker, args=(body_queue, send_item), daemon=True)
+               for _ in range(max_workers)]
+    for thread in encoders + senders:
+        thread.start()
+
+    try:
+        for chunk in chunks:
+            chunk_id = key(chunk) if journal is not None else None
+            if chunk_id is not None and chunk_id in journal:
+                finished(size(chunk), False)
+                continue
+            if not _put(chunk_queue, (chunk, chunk_id), failed):
+                break
+    except Exception as e:
+        fail(e)
+
+    for _ in encoders:
+        _put(chunk_queue, _DONE, failed)
+    for thread in encoders:
+        thread.join()
+    for _ in senders:
+        _put(body_queue, _DONE, failed)
+    for thread in senders:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return state["sent"]
+
+
+_DONE = object()
+
+
+def _put(target, item, failed):
+    # put into a bounded queue unless the pipeline failed meanwhile; returns False in that case
+    while not failed.is_set():
+        try:
+            target.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
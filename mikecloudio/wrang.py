@@ -1,4 +1,6 @@
+from collections.abc import Mapping
 from datetime import datetime, timedelta, timezone, date
+import numpy as np
 import pandas as pd
 
 
@@ -19,16 +21,84 @@ def importExcel(path, columnOfValue, columnOfTimestamp, timezone_hr=2, timezone_
 
 
 def splitDF(df,distinctFeature):
+    """
+    split a dataframe into one dataframe per distinct value of a column, e.g. a long table of many stations
+    into one table per station. The rows are grouped in a single pass with partition_df().
+
+    :param df: dataframe to split
+    :type df: pd.DataFrame
+    :param distinctFeature: name of the column whose values define the parts
+    :type distinctFeature: str
+    :return: dict of value to dataframe (with the original index as column "index") and the list of values
+        in order of appearance
+    :rtype: tuple
+    """
+    partitions = partition_df(df, distinctFeature, reset_index=True)
+    return {key: partitions[key] for key in partitions}, list(partitions)
+
+
+def partition_df(df, key_column, reset_index=False):
+    """
+    group the rows of a dataframe by the values of a column in a single pass, without a boolean mask per key.
+    The keys are factorized and the row positions sorted by key once; a partition is only built when it is
+    accessed, by slicing if its rows are contiguous (e.g. if df is sorted by key_column) and by take() otherwise.
+    Every access builds a new dataframe, so changes to a partition are not kept by the mapping.
+
+    :param df: dataframe to partition
+    :type df: pd.DataFrame
+    :param key_column: name of the column whose values define the partitions
+    :type key_column: str
+    :param reset_index: if True, the original index of every partition is moved into a column "index"
+    :type reset_index: bool
+    :return: read-only mapping of key to partition, keys in order of appearance
+    :rtype: Partitions
+    """
+    codes, keys = pd.factorize(df[key_column], use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(keys)))))
+    positions = {key: order[bounds[i]:bounds[i + 1]] for i, key in enumerate(keys)}
+    return Partitions(df, positions, reset_index)
+
+
+class Partitions(Mapping):
+
+    def __init__(self, df, positions, reset_index=False):
+        """
+        Partitions of a dataframe as returned by partition_df(); use like a read-only dict.
+
+        :param df: partitioned dataframe
+        :type df: pd.DataFrame
+        :param positions: row positions of every key
+        :type positions: dict
+        :param reset_index: if True, the original index is moved into a column "index"
+        :type reset_index: bool
+        """
+        self.df = df
+        self.positions = positions
+        self.reset_index = reset_index
+
+    def __getitem__(self, key):
+        rows = self.positions[key]
+        if len(rows) > 0 and rows[-1] - rows[0] + 1 == len(rows):
+            part = self.df.iloc[rows[0]:rows[-1] + 1]
+        else:
+            part = self.df.take(rows)
+        if self.reset_index:
+            part = part.reset_index()
+        return part
+
+    def __iter__(self):
+        return iter(self.positions)
 
-    UniqueNames = df[distinctFeature].unique()
+    def __len__(self):
+        return len(self.positions)
 
-    # create a data frame dictionary to store your data frames
-    DataFrameDict = {elem : pd.DataFrame for elem in UniqueNames}
-    list_=[]
-    for key in DataFrameDict.keys():
-        DataFrameDict[key] = df[:][df[distinctFeature] == key].reset_index()
-        list_.append(key)
-    return DataFrameDict,list_
+    def sizes(self):
+        """
+        :return: number of rows per key, without materializing any partition
+        :rtype: dict
+        """
+        return {key: len(rows) for key, rows in self.positions.items()}
 
 
 # need to add information on what the parameters are
@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mikecloudio  # noqa: E402
+from benchmarks.fake_service import FakeService  # noqa: E402
+
+
+@pytest.fixture
+def service():
+    service = FakeService()
+    service.url = service.start()
+    yield service
+    service.stop()
+
+
+@pytest.fixture
+def connection(service):
+    retry = mikecloudio.RetryPolicy(backoff_factor=0.0)
+    with mikecloudio.Connection("key", project_id=service.project_id, service_url=service.url,
+                                retry_policy=retry) as con:
+        yield con
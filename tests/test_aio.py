@@ -0,0 +1,121 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from mikecloudio.aio import AsyncConnection, gather_limited
+from mikecloudio.exceptions import ServiceUnavailableError
+from mikecloudio.transport import RetryPolicy
+
+
+def run(service, test):
+    async def main():
+        async with AsyncConnection("key", project_name=service.project_name, service_url=service.url,
+                                   retry_policy=RetryPolicy(backoff_factor=0.0)) as con:
+            return await test(con)
+    return asyncio.run(main())
+
+
+def test_gather_limited_keeps_order_and_limit():
+    running = []
+    peak = []
+
+    async def job(i):
+        running.append(i)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(i)
+        return i
+
+    assert asyncio.run(gather_limited([job(i) for i in range(10)], limit=3)) == list(range(10))
+    assert max(peak) == 3
+
+
+def test_get_data_of_many_timeseries_concurrently(service):
+    for i in range(4):
+        service.add_timeseries("d1", "t{0}".format(i), name="n{0}".format(i), rows=20)
+
+    async def test(con):
+        ds = await con.get_ds(id="d1")
+        handles = await ds.get_many_ts(names=["n0", "n1"], ids=["t2", "t3"])
+        return [ts._id for ts in handles], await asyncio.gather(*(ts.get_data() for ts in handles))
+
+    ids, frames = run(service, test)
+
+    assert ids == ["t0", "t1", "t2", "t3"]
+    assert [len(df) for df in frames] == [20] * 4
+    assert service.requests["ts_list"] == 1
+    assert service.requests["values"] == 4
+
+
+def test_duplicate_name_resolves_like_the_sync_client(service):
+    service.add_timeseries("d1", "t1", name="level")
+    service.add_timeseries("d1", "t2", name="level")
+
+    async def test(con):
+        ds = await con.get_ds(id="d1")
+        return await ds.query_ts_id("level")
+
+    with pytest.warns(UserWarning):
+        assert run(service, test) == "t2"
+
+
+def test_add_data_and_add_csv(service, tmp_path):
+    service.add_timeseries("d1", "t1")
+    path = tmp_path / "data.csv"
+    index = pd.date_range("2020-01-01", periods=25, freq="min", name="timestamp")
+    pd.DataFrame({"value": range(25)}, index=index, dtype=float).to_csv(path)
+
+    async def test(con):
+        ds = await con.get_ds(id="d1")
+        ts = await ds.get_ts(id="t1")
+        await ts.add_data(pd.DataFrame({"value": [1.0, 2.0]}, index=index[:2]))
+        return await ts.add_csv(path, chunk_size=10, limit=2)
+
+    assert run(service, test) == 25
+    assert service.datasets["d1"]["timeseries"]["t1"].uploaded_rows == 27
+    assert service.requests["upload"] == 4
+
+
+def test_create_ts_validates_and_is_found_afterwards(service):
+    service.add_dataset("d1")["properties"] = ["station"]
+
+    async def test(con):
+        ds = await con.get_ds(id="d1")
+        with pytest.raises(ValueError):
+            await ds.create_ts("a", properties={"unknown": 1})
+        await ds.ts_index()
+        ts = await ds.create_ts("a", properties={"station": "x"})
+        return ts._id, await ds.query_ts_id("a")
+
+    created, found = run(service, test)
+
+    assert created == found
+    assert service.requests["ts_create"] == 1
+
+
+def test_deletions_need_confirm(service):
+    service.add_timeseries("d1", "t1", name="a")
+    service.add_timeseries("d1", "t2", name="b")
+
+    async def test(con):
+        ds = await con.get_ds(id="d1")
+        await ds.del_ts(name="a")
+        await ds.del_ts(name="b", confirm=True)
+        return await ds.check_ts_exist("a"), await ds.check_ts_exist("b")
+
+    assert run(service, test) == (True, False)
+    assert set(service.datasets["d1"]["timeseries"]) == {"t1"}
+
+
+def test_unavailable_service_is_retried(service):
+    service.add_timeseries("d1", "t1", rows=5)
+
+    async def test(con):
+        ts = await (await con.get_ds(id="d1")).get_ts(id="t1")
+        service.error_rate = 1.0
+        await ts.get_data()
+
+    with pytest.raises(ServiceUnavailableError):
+        run(service, test)
+    assert service.requests["error"] == RetryPolicy().max_retries + 1
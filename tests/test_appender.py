@@ -0,0 +1,88 @@
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mikecloudio.appender import Appender
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def ts(service, connection):
+    service.add_timeseries("d1", "t1")
+    return connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+
+def uploaded(service):
+    return service.datasets["d1"]["timeseries"]["t1"].uploaded_rows
+
+
+def test_full_buffer_is_uploaded_in_the_background(service, ts):
+    with Appender(max_rows=3, max_age=None) as appender:
+        appender.append(ts, "2020-01-01T00:00:00", 1.0)
+        appender.append(ts, "2020-01-01T00:01:00", 2.0)
+        assert not wait_for(lambda: uploaded(service) > 0, timeout=0.2)
+
+        appender.append(ts, "2020-01-01T00:02:00", 3.0)
+
+        assert wait_for(lambda: uploaded(service) == 3)
+        assert service.requests["upload"] == 1
+
+
+def test_old_rows_are_uploaded_after_max_age(service, ts):
+    with Appender(max_rows=1000, max_age=0.05) as appender:
+        appender.append(ts, "2020-01-01T00:00:00", 1.0)
+
+        assert wait_for(lambda: uploaded(service) == 1)
+
+
+def test_close_uploads_the_rest_and_rejects_new_rows(service, ts):
+    appender = Appender(max_rows=1000, max_age=None)
+    appender.append(ts, pd.DataFrame({"value": [1.0, 2.0]},
+                                     index=pd.date_range("2020-01-01", periods=2, freq="min")))
+    assert len(appender) == 2
+
+    appender.close()
+
+    assert uploaded(service) == 2
+    assert len(appender) == 0
+    with pytest.raises(ValueError):
+        appender.append(ts, "2020-01-01T00:02:00", 3.0)
+
+
+def test_single_rows_take_numpy_scalars_timestamps_and_nan(service, ts):
+    with Appender(max_rows=1000, max_age=None) as appender:
+        appender.append(ts, pd.Timestamp("2020-01-01"), np.float32(1.5))
+        appender.append(ts, np.datetime64("2020-01-01T00:01:00"), np.nan)
+
+    assert uploaded(service) == 2
+
+
+def test_failed_upload_is_kept_for_the_next_flush(service, ts):
+    errors = []
+    service.failures["upload"] = 500
+    with Appender(max_rows=1000, max_age=None, on_error=lambda ts, e: errors.append(e)) as appender:
+        appender.append(ts, "2020-01-01T00:00:00", 1.0)
+        appender.flush()
+        assert len(errors) == 1
+        assert len(appender) == 1
+
+        del service.failures["upload"]
+        appender.flush()
+
+        assert len(appender) == 0
+    assert uploaded(service) == 1
+
+
+def test_max_age_must_be_positive():
+    with pytest.raises(ValueError):
+        Appender(max_age=0)
@@ -0,0 +1,69 @@
+import mikecloudio
+from mikecloudio.cache import TTLCache
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("mikecloudio.cache.time.monotonic", lambda: now[0])
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1)
+
+    now[0] = 109.9
+    assert cache.get("a") == 1
+    now[0] = 110.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_none_keeps_and_ttl_zero_disables_entries(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("mikecloudio.cache.time.monotonic", lambda: now[0])
+    forever = TTLCache(ttl=None)
+    disabled = TTLCache(ttl=0)
+    forever.set("a", 1)
+    disabled.set("a", 1)
+
+    now[0] = 1e9
+
+    assert "a" in forever
+    assert "a" not in disabled
+
+
+def test_invalidate_key_and_prefix():
+    cache = TTLCache()
+    for key in [("ts", "d1", "t1"), ("ts", "d1", "t2"), ("ts", "d2", "t1"), ("ts-index", "d1")]:
+        cache.set(key, 1)
+
+    cache.invalidate(("ts", "d2", "t1"))
+    cache.invalidate_prefix(("ts", "d1"))
+
+    assert len(cache) == 1
+    assert ("ts-index", "d1") in cache
+
+
+def test_get_info_is_requested_once_within_ttl(service, connection):
+    service.add_timeseries("d1", "t1", rows=5)
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    ts.get_data()
+    ts.get_data()
+    ts.get_info()
+
+    assert service.requests["ts_info"] == 1
+
+
+def test_get_info_after_invalidation_and_with_disabled_cache(service):
+    service.add_timeseries("d1", "t1")
+    with mikecloudio.Connection("key", project_id=service.project_id, service_url=service.url,
+                                metadata_ttl=0) as con:
+        ts = con.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+        ts.get_info()
+        ts.get_info()
+    assert service.requests["ts_info"] == 2
+
+    with mikecloudio.Connection("key", project_id=service.project_id, service_url=service.url) as con:
+        ts = con.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+        ts.get_info()
+        ts.invalidate_info()
+        ts.get_info()
+    assert service.requests["ts_info"] == 4
@@ -0,0 +1,94 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from mikecloudio.codec import _cut_rows, column_values, decode_stream, decode_values, format_timestamps, \
+    iter_row_batches
+
+INFO = {"item": {"name": "level", "item": "eumIWaterLevel", "dataType": "Double"},
+        "dataFields": [{"name": "quality", "dataType": "Single"}, {"name": "note", "dataType": "Text"},
+                       {"name": "measured", "dataType": "DateTime"}]}
+
+ROWS = [["2020-01-01T00:00:00", 1.5, 0.25, "a ] b", "2020-01-01T00:00:00"],
+        ["2020-01-01T00:01:00", None, 1.0, "c,[d", None],
+        ["2020-01-01T00:02:00", 2.5, None, "æøå", "2020-01-02T12:00:00"]]
+
+
+def split(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 100000])
+@pytest.mark.parametrize("batch_bytes", [1, 40, 1 << 20])
+def test_iter_row_batches_returns_all_rows_in_order(chunk_size, batch_bytes):
+    body = json.dumps({"data": ROWS}).encode("utf-8")
+
+    batches = list(iter_row_batches(split(body, chunk_size), batch_bytes))
+
+    assert [row for batch in batches for row in batch] == ROWS
+    assert all(batches)
+
+
+def test_iter_row_batches_of_empty_data():
+    assert list(iter_row_batches([b'{"data": []}'])) == []
+
+
+def test_iter_row_batches_without_data_array():
+    with pytest.raises(ValueError):
+        list(iter_row_batches([b'{"error": "x"}']))
+
+
+def test_iter_row_batches_of_truncated_response():
+    with pytest.raises(ValueError):
+        list(iter_row_batches([b'{"data": [["2020-01-01T00:00:00", 1']))
+
+
+def test_cut_rows_keeps_incomplete_row():
+    rows, rest = _cut_rows('["t1", 1], ["t2", "x ], ["], ["t3", 3')
+
+    assert rows == [["t1", 1], ["t2", "x ], ["]]
+    assert rest == '["t3", 3'
+
+
+def test_cut_rows_without_complete_row():
+    assert _cut_rows('["t1", "]", 1') == ([], '["t1", "]", 1')
+
+
+def test_decode_stream_matches_decode_values():
+    body = json.dumps({"data": ROWS}).encode("utf-8")
+
+    expected = decode_values(ROWS, INFO)
+    result = decode_stream(split(body, 16), INFO, batch_bytes=32)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert result.index.dtype == np.dtype("datetime64[ns]")
+    assert result["quality"].dtype == np.float32
+
+
+def test_decode_stream_matches_decode_values_for_utc_timestamps():
+    rows = [["2020-01-01T00:00:00Z", 1.0, 2.0, "x", None], ["2020-01-01T00:00:00.5Z", 2.0, 3.0, "y", None]]
+    body = json.dumps({"data": rows}).encode("utf-8")
+
+    pd.testing.assert_frame_equal(decode_stream([body], INFO), decode_values(rows, INFO))
+
+
+def test_column_values_formats_datetimes():
+    series = pd.Series(pd.to_datetime(["2020-01-01T00:00:01", None]))
+
+    values = column_values(series)
+
+    assert values == ["2020-01-01T00:00:01", None]
+    json.dumps(values)
+
+
+def test_format_timestamps_rejects_missing_timestamps():
+    with pytest.raises(ValueError):
+        format_timestamps(pd.DatetimeIndex(["2020-01-01", None]))
+
+
+def test_format_timestamps_uses_coarsest_exact_unit():
+    index = pd.DatetimeIndex(["2020-01-01T00:00:00", "2020-01-01T00:00:00.5"]).tz_localize("UTC")
+
+    assert format_timestamps(index) == ["2020-01-01T00:00:00.000Z", "2020-01-01T00:00:00.500Z"]
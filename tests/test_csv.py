@@ -0,0 +1,47 @@
+import pandas as pd
+import pytest
+
+
+def write_csv(path, rows):
+    index = pd.date_range("2020-01-01", periods=rows, freq="min", name="timestamp")
+    pd.DataFrame({"value": range(rows), "quality": 1.0}, index=index).to_csv(path)
+    return path
+
+
+def test_add_csv_uploads_in_chunks(service, connection, tmp_path):
+    service.add_timeseries("d1", "t1")
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+    progress = []
+
+    ts.add_csv(write_csv(tmp_path / "data.csv", 25), columns=["value"], chunk_size=10,
+               progress=lambda done, total: progress.append((done, total)))
+
+    assert service.requests["upload"] == 3
+    assert service.datasets["d1"]["timeseries"]["t1"].uploaded_rows == 25
+    assert progress == [(10, None), (20, None), (25, None)]
+
+
+def test_add_csv_reads_the_file_in_chunks(service, connection, tmp_path, monkeypatch):
+    service.add_timeseries("d1", "t1")
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+    read_csv = pd.read_csv
+    calls = []
+
+    def recording_read_csv(*args, **kwargs):
+        calls.append(kwargs)
+        return read_csv(*args, **kwargs)
+    monkeypatch.setattr(pd, "read_csv", recording_read_csv)
+
+    ts.add_csv(write_csv(tmp_path / "data.csv", 25), columns=["value"], chunk_size=10)
+
+    assert all(call.get("chunksize") == 10 or call.get("nrows") == 0 for call in calls)
+
+
+def test_add_csv_checks_columns_before_uploading(service, connection, tmp_path):
+    service.add_timeseries("d1", "t1")
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    with pytest.raises(ValueError):
+        ts.add_csv(write_csv(tmp_path / "data.csv", 5))
+
+    assert "upload" not in service.requests
@@ -0,0 +1,127 @@
+import pandas as pd
+import pytest
+
+
+def test_get_data_many_aligns_timeseries_in_one_frame(service, connection):
+    service.add_timeseries("d1", "t1", name="a", rows=10)
+    service.add_timeseries("d1", "t2", name="b", rows=5)
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    df = ds.get_data_many(["a", "t2"])
+
+    assert list(df.columns) == ["a", "t2"]
+    assert len(df) == 10
+    assert df["t2"].isna().sum() == 5
+    assert service.requests["ts_list"] == 1
+    assert service.requests["values"] == 2
+    assert "ts_info" not in service.requests
+
+
+def test_get_data_many_long_format(service, connection):
+    service.add_timeseries("d1", "t1", rows=3, data_fields=1)
+    service.add_timeseries("d1", "t2", rows=2, data_fields=1)
+
+    df = connection.get_ds(id="d1", lazy=True).get_data_many(["t1", "t2"], how="long")
+
+    assert list(df.columns) == ["timestamp", "timeseries", "value", "field0"]
+    assert df["timeseries"].tolist() == ["t1"] * 3 + ["t2"] * 2
+
+
+def test_get_data_many_of_unknown_timeseries(service, connection):
+    service.add_timeseries("d1", "t1")
+
+    with pytest.raises(ValueError):
+        connection.get_ds(id="d1", lazy=True).get_data_many(["t1", "missing"])
+
+
+def test_get_info_returns_a_copy_of_the_cached_info(service, connection):
+    service.add_timeseries("d1", "t1")
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    ts.get_info()["item"]["name"] = "changed"
+
+    assert ts.get_info()["item"]["name"] == "t1"
+    assert service.requests["ts_info"] == 1
+
+
+def test_update_properties_invalidates_cached_info(service, connection):
+    service.add_timeseries("d1", "t1")
+    ds = connection.get_ds(id="d1", lazy=True)
+    ts = ds.get_ts(id="t1", lazy=True)
+    ts.get_info()
+
+    ds.update_properties({"station": "north"}, id="t1")
+
+    assert ts.get_info()["properties"] == {"station": "north"}
+    assert ds.ts_index().records["t1"]["properties"] == {"station": "north"}
+
+
+def long_frame():
+    return pd.DataFrame({"station": ["a", "b", "a", "c", "b"],
+                         "time": pd.date_range("2020-01-01", periods=5, freq="min"),
+                         "value": [1.0, 2.0, 3.0, 4.0, 5.0]})
+
+
+def test_ingest_uploads_every_key_and_creates_missing_timeseries(service, connection):
+    service.add_timeseries("d1", "t1", name="a")
+    service.add_timeseries("d1", "t2", name="b")
+    ds = connection.get_ds(id="d1", lazy=True)
+    progress = []
+
+    series = ds.ingest(long_frame(), "station", time_column="time", ts_options={"data_type": "Double"},
+                       progress=lambda done, total: progress.append((done, total)))
+
+    timeseries = service.datasets["d1"]["timeseries"]
+    assert series["a"].id == "t1" and series["b"].id == "t2"
+    assert timeseries[series["c"].id].name == "c"
+    assert [timeseries[series[key].id].uploaded_rows for key in "abc"] == [2, 2, 1]
+    assert progress[-1] == (5, 5)
+
+
+def test_ingest_without_create_missing_uploads_nothing(service, connection):
+    service.add_timeseries("d1", "t1", name="a")
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    with pytest.raises(ValueError, match="do not exist"):
+        ds.ingest(long_frame(), "station", time_column="time", create_missing=False)
+
+    assert "upload" not in service.requests
+    assert "ts_create" not in service.requests
+
+
+def test_ingest_takes_ids_as_keys_and_splits_chunks(service, connection):
+    service.add_timeseries("d1", "t1", name="a")
+    ds = connection.get_ds(id="d1", lazy=True)
+    df = long_frame().assign(station="t1").set_index("time")
+
+    ds.ingest(df, "station", chunk_size=2)
+
+    assert service.datasets["d1"]["timeseries"]["t1"].uploaded_rows == 5
+    assert service.requests["upload"] == 3
+
+
+def test_create_ts_many_requests_the_schema_once(service, connection):
+    service.add_dataset("d1")["properties"] = ["station"]
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    created = ds.create_ts_many(["a", {"name": "b", "properties": {"station": "x"}},
+                                 {"name": "c", "properties": {"station": "y"}}])
+
+    assert [ts.name for ts in created] == ["a", "b", "c"]
+    assert service.requests["schema"] == 1
+    assert service.requests["ts_create"] == 3
+    assert ds.check_ts_exist("c")
+
+
+@pytest.mark.parametrize("spec", [{"data_type": "Double"},
+                                  {"name": "b", "properties": {"unknown": 1}},
+                                  {"name": "b", "data_fields": [{"name": "f", "dataType": "Decimal"}]},
+                                  {"name": "b", "data_fields": {"name": "f"}}])
+def test_create_ts_many_validates_all_specs_before_creating_any(service, connection, spec):
+    service.add_dataset("d1")["properties"] = ["station"]
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    with pytest.raises(ValueError):
+        ds.create_ts_many(["a", spec])
+
+    assert "ts_create" not in service.requests
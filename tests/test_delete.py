@@ -0,0 +1,85 @@
+import pandas as pd
+import pytest
+
+from mikecloudio.delete import Deletion, run_deletions
+
+
+def test_run_deletions_requires_confirm_or_dry_run():
+    deleted = []
+
+    with pytest.raises(ValueError):
+        run_deletions([Deletion("a", "timeseries", "a", lambda: deleted.append("a"))])
+
+    assert deleted == []
+
+
+def test_dry_run_deletes_nothing():
+    deleted = []
+
+    report = run_deletions([Deletion("a", "timeseries", "a", lambda: deleted.append("a"))], dry_run=True)
+
+    assert deleted == []
+    assert list(report["status"]) == ["dry run"]
+
+
+def test_failing_deletion_does_not_stop_the_others():
+    def fail():
+        raise RuntimeError("boom")
+    deleted = []
+    deletions = [Deletion("a", "timeseries", "a", fail),
+                 Deletion("b", "timeseries", "b", lambda: deleted.append("b")),
+                 Deletion("c", "timeseries", error="timeseries c does not exist")]
+
+    report = run_deletions(deletions, confirm=True)
+
+    assert deleted == ["b"]
+    assert list(report["status"]) == ["failed", "deleted", "not found"]
+    assert report["error"][0] == "boom"
+
+
+def test_del_ts_many_resolves_targets_from_one_listing(service, connection):
+    service.add_timeseries("d1", "t1", name="a", rows=10)
+    service.add_timeseries("d1", "t2", name="b")
+    service.add_timeseries("d1", "t3", name="dup")
+    service.add_timeseries("d1", "t4", name="dup")
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    report = ds.del_ts_many(["a", "t2", "dup", "missing"], confirm=True)
+
+    assert list(report["status"]) == ["deleted", "deleted", "not found", "not found"]
+    assert list(report["id"][:2]) == ["t1", "t2"]
+    assert set(service.datasets["d1"]["timeseries"]) == {"t3", "t4"}
+    assert service.requests["ts_list"] == 1
+    assert "choose by ID" in report["error"][2]
+
+
+def test_del_ts_many_deletes_data_ranges(service, connection):
+    service.add_timeseries("d1", "t1", name="a", rows=10)
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    report = ds.del_ts_many([("a", "2000-01-01T000500", None)], confirm=True)
+
+    assert list(report[["kind", "status"]].iloc[0]) == ["data", "deleted"]
+    assert service.requests["values_delete"] == 1
+    assert "t1" in service.datasets["d1"]["timeseries"]
+
+
+def test_del_ts_many_dry_run_keeps_the_timeseries(service, connection):
+    service.add_timeseries("d1", "t1", name="a")
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    report = ds.del_ts_many(["a"], dry_run=True)
+
+    assert list(report["status"]) == ["dry run"]
+    assert "t1" in service.datasets["d1"]["timeseries"]
+
+
+def test_del_ds_many_deletes_datasets_by_name_and_id(service, connection):
+    for id in ["d1", "d2", "d3"]:
+        service.add_dataset(id, name="name-" + id)
+
+    report = connection.del_ds_many(["name-d1", "d2"], confirm=True)
+
+    assert isinstance(report, pd.DataFrame)
+    assert list(report["status"]) == ["deleted", "deleted"]
+    assert set(service.datasets) == {"d3"}
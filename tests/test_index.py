@@ -0,0 +1,71 @@
+import warnings
+
+import pytest
+
+from mikecloudio.cache import NameIndex
+
+
+def test_name_index_maps_duplicate_names_to_all_ids():
+    index = NameIndex([{"id": "1", "name": "a"}, {"id": "2", "name": "b"}, {"id": "3", "name": "a"}])
+
+    assert index.ids("a") == ["1", "3"]
+    assert index.ids("c") == []
+    assert index.name("2") == "b"
+    assert "3" in index and "4" not in index
+    assert len(index) == 3
+
+
+def test_lookups_share_one_listing(service, connection):
+    for i in range(3):
+        service.add_timeseries("d1", "t{0}".format(i), name="n{0}".format(i))
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    assert [ds.query_ts_id("n{0}".format(i)) for i in range(3)] == ["t0", "t1", "t2"]
+    assert ds.query_ts_name("t1") == "n1"
+    assert ds.check_ts_exist("n2")
+    assert service.requests["ts_list"] == 1
+
+
+def test_duplicate_name_resolves_to_last_listed_id_with_warning(service, connection):
+    service.add_timeseries("d1", "t1", name="level")
+    service.add_timeseries("d1", "t2", name="level")
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    with pytest.warns(UserWarning, match="2 timeseries with name 'level'"):
+        assert ds.query_ts_id("level") == "t2"
+
+
+def test_unknown_name_refreshes_the_index_once(service, connection):
+    service.add_timeseries("d1", "t1", name="a")
+    ds = connection.get_ds(id="d1", lazy=True)
+    ds.query_ts_id("a")
+    service.add_timeseries("d1", "t2", name="b")
+
+    assert ds.query_ts_id("b") == "t2"
+    with pytest.raises(ValueError):
+        ds.query_ts_id("c")
+    assert service.requests["ts_list"] == 3
+
+
+def test_created_timeseries_is_found_without_waiting_for_the_ttl(service, connection):
+    service.add_timeseries("d1", "t1", name="a")
+    ds = connection.get_ds(id="d1", lazy=True)
+    ds.query_ts_id("a")
+
+    ds.create_ts("b")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        assert ds.check_ts_exist("b")
+
+
+def test_handle_resolved_from_the_index_needs_no_info_request(service, connection):
+    service.add_timeseries("d1", "t1", name="level", rows=5)
+    ds = connection.get_ds(id="d1", lazy=True)
+
+    ts = ds.get_ts(name="level", lazy=True)
+    data = ts.get_data()
+
+    assert len(data) == 5
+    assert service.requests["ts_list"] == 1
+    assert "ts_info" not in service.requests
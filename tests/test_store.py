@@ -0,0 +1,181 @@
+import pandas as pd
+import pytest
+
+import mikecloudio
+from mikecloudio.store import _MAX, _MIN, LocalStore, _subtract, _union
+
+
+def ts(value):
+    return pd.Timestamp(value)
+
+
+def test_union_merges_overlapping_and_touching_ranges():
+    ranges = [(ts("2020-01-05"), ts("2020-01-06")), (ts("2020-01-01"), ts("2020-01-03")),
+              (ts("2020-01-03"), ts("2020-01-04")), (ts("2020-01-02"), ts("2020-01-02"))]
+
+    assert _union(ranges) == [(ts("2020-01-01"), ts("2020-01-04")), (ts("2020-01-05"), ts("2020-01-06"))]
+
+
+def test_subtract_leaves_gaps():
+    result = _subtract([(ts("2020-01-01"), ts("2020-01-10"))],
+                       [(ts("2020-01-03"), ts("2020-01-04")), (ts("2020-01-06"), ts("2020-01-12"))])
+
+    assert result == [(ts("2020-01-01"), ts("2020-01-03")), (ts("2020-01-04"), ts("2020-01-06"))]
+
+
+def test_subtract_covered_range_is_empty():
+    assert _subtract([(ts("2020-01-02"), ts("2020-01-03"))], [(_MIN, _MAX)]) == []
+
+
+def test_subtract_without_removed_ranges():
+    assert _subtract([(ts("2020-01-02"), ts("2020-01-03"))], []) == [(ts("2020-01-02"), ts("2020-01-03"))]
+
+
+class StoredTimeseries:
+
+    def __init__(self, id):
+        self._id_ds = "d1"
+        self.id = id
+
+
+class Service:
+
+    def __init__(self):
+        self.index = pd.date_range("2020-01-01", "2020-01-10", freq="h", name="timestamp")
+        self.requests = []
+
+    def fetch(self, time_from, time_to):
+        self.requests.append((time_from, time_to))
+        start = pd.Timestamp.min if time_from is None else pd.Timestamp(time_from)
+        end = pd.Timestamp.max if time_to is None else pd.Timestamp(time_to)
+        index = self.index[(self.index >= start) & (self.index <= end)]
+        return pd.DataFrame({"value": range(len(index))}, index=index, dtype=float)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalStore(tmp_path, format="pickle")
+
+
+def test_get_data_fetches_only_missing_ranges(store):
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+
+    store.get_data(timeseries, "2020-01-02T000000", "2020-01-04T000000", service.fetch)
+    data = store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+
+    assert service.requests == [("2020-01-02T000000", "2020-01-04T000000"),
+                                ("2020-01-01T000000", "2020-01-02T000000"),
+                                ("2020-01-04T000000", "2020-01-05T000000")]
+    assert list(data.index) == list(service.index[(service.index >= "2020-01-01") & (service.index <= "2020-01-05")])
+
+
+def test_get_data_of_covered_range_sends_no_request(store):
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+    service.requests.clear()
+
+    data = store.get_data(timeseries, "2020-01-02T000000", "2020-01-03T000000", service.fetch)
+
+    assert service.requests == []
+    assert len(data) == 25
+
+
+def test_forget_fetches_range_again(store):
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+    service.requests.clear()
+
+    store.forget(timeseries, "2020-01-02T000000", "2020-01-03T000000")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+
+    assert service.requests == [("2020-01-01T235959", "2020-01-03T000001")]
+
+
+def test_get_data_many_through_local_store(service, tmp_path):
+    for i in range(3):
+        service.add_timeseries("d1", "t{0}".format(i), rows=100)
+    with mikecloudio.Connection("key", project_id=service.project_id, service_url=service.url,
+                                local_store=tmp_path) as con:
+        ds = con.get_ds(id="d1", lazy=True)
+        first = ds.get_data_many(["t0", "t1", "t2"])
+        second = ds.get_data_many(["t0", "t1", "t2"])
+
+    pd.testing.assert_frame_equal(first, second)
+    assert first.shape == (100, 3)
+
+
+def test_subtract_keeps_single_timestamp_outside_removed_ranges():
+    covered = [(ts("2020-01-01"), ts("2020-01-02"))]
+
+    assert _subtract([(ts("2020-01-05"), ts("2020-01-05"))], covered) == [(ts("2020-01-05"), ts("2020-01-05"))]
+    assert _subtract([(ts("2020-01-02"), ts("2020-01-02"))], covered) == []
+
+
+def test_get_data_of_single_timestamp_outside_coverage(store):
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-02T000000", service.fetch)
+
+    data = store.get_data(timeseries, "2020-01-05T000000", "2020-01-05T000000", service.fetch)
+
+    assert service.requests[-1] == ("2020-01-05T000000", "2020-01-05T000000")
+    assert list(data.index) == [pd.Timestamp("2020-01-05")]
+
+
+def test_get_data_writes_new_ranges_without_rewriting_stored_parts(tmp_path):
+    store = LocalStore(tmp_path, format="pickle", part_rows=24)
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-03T000000", service.fetch)
+    directory = tmp_path / "d1" / "t1"
+    before = {path.name: path.stat().st_mtime_ns for path in directory.glob("*.pickle") if path.stem != "schema"}
+
+    store.get_data(timeseries, "2020-01-05T000000", "2020-01-06T000000", service.fetch)
+
+    after = {path.name: path.stat().st_mtime_ns for path in directory.glob("*.pickle") if path.stem != "schema"}
+    assert len(before) == 3
+    assert {name: after[name] for name in before} == before
+    assert len(after) == 5
+
+
+def test_read_loads_only_overlapping_parts(tmp_path, monkeypatch):
+    store = LocalStore(tmp_path, format="pickle", part_rows=24)
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+    read = []
+    read_frame = store._read_frame
+    monkeypatch.setattr(store, "_read_frame", lambda path: read.append(path.stem) or read_frame(path))
+
+    data = store.read(timeseries, "2020-01-02T030000", "2020-01-02T050000")
+
+    assert len(data) == 3
+    assert sorted(read) == ["1", "schema"]
+
+
+def test_fetched_range_replaces_stored_rows(store):
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+
+    service.index = service.index[service.index != pd.Timestamp("2020-01-02T120000")]
+    store.forget(timeseries, "2020-01-02T000000", "2020-01-03T000000")
+    data = store.get_data(timeseries, "2020-01-01T000000", "2020-01-05T000000", service.fetch)
+
+    assert pd.Timestamp("2020-01-02T120000") not in data.index
+    assert len(data) == 96
+    assert data.index.is_monotonic_increasing
+
+
+def test_small_parts_are_merged(store):
+    service = Service()
+    timeseries = StoredTimeseries("t1")
+    for day in range(1, 10):
+        store.get_data(timeseries, "2020-01-0{0}T000000".format(day), "2020-01-0{0}T000000".format(day),
+                       service.fetch)
+
+    assert len(store.read(timeseries)) == 9
+    assert len(store._read_index(timeseries)["parts"]) < 8
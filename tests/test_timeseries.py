@@ -0,0 +1,61 @@
+import pandas as pd
+
+from mikecloudio.timeseries import split_time_range
+
+
+def test_split_time_range_auto_on_short_range():
+    windows = split_time_range("2020-01-01T000000", "2020-01-01T000003", "auto")
+
+    assert windows == [("2020-01-01T000000", "2020-01-01T000001"), ("2020-01-01T000001", "2020-01-01T000002"),
+                       ("2020-01-01T000002", "2020-01-01T000003")]
+
+
+def test_split_time_range_drops_empty_windows():
+    windows = split_time_range("2020-01-01T000000", "2020-01-01T000002", "300ms")
+
+    assert windows == [("2020-01-01T000000", "2020-01-01T000001"), ("2020-01-01T000001", "2020-01-01T000002")]
+
+
+def test_journal_shared_by_timeseries_keeps_them_apart(service, connection, tmp_path):
+    service.add_timeseries("d1", "t1")
+    service.add_timeseries("d1", "t2")
+    ds = connection.get_ds(id="d1", lazy=True)
+    df = pd.DataFrame({"value": range(10)}, index=pd.date_range("2020-01-01", periods=10, freq="h"), dtype=float)
+
+    for id in ("t1", "t2", "t2"):
+        ds.get_ts(id=id).add_data(df, chunk_size=5, journal=tmp_path / "journal")
+
+    assert service.datasets["d1"]["timeseries"]["t1"].uploaded_rows == 10
+    assert service.datasets["d1"]["timeseries"]["t2"].uploaded_rows == 10
+
+
+def test_iter_data_yields_the_range_once_in_time_order(service, connection):
+    service.add_timeseries("d1", "t1", rows=100)
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    frames = list(ts.iter_data("2000-01-01T000000", "2000-01-01T013000", window="30min"))
+
+    data = pd.concat(frames)
+    assert len(frames) == 3
+    assert data.index.is_unique and data.index.is_monotonic_increasing
+    pd.testing.assert_frame_equal(data, ts.get_data("2000-01-01T000000", "2000-01-01T013000", typed=True))
+
+
+def test_iter_data_skips_empty_windows(service, connection):
+    service.add_timeseries("d1", "t1", rows=30)
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    frames = list(ts.iter_data("2000-01-01T000000", "2000-01-01T020000", window="30min", prefetch=0))
+
+    assert [len(df) for df in frames] == [30]
+
+
+def test_iter_data_stopped_early_requests_at_most_the_prefetched_windows(service, connection):
+    service.add_timeseries("d1", "t1", rows=1000)
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    windows = ts.iter_data("2000-01-01T000000", "2000-01-01T160000", window="1h", prefetch=2)
+    next(windows)
+    windows.close()
+
+    assert service.requests["values"] <= 3
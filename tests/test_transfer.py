@@ -0,0 +1,15 @@
+import mikecloudio.request
+
+
+def test_import_file_keeps_the_cached_upload_url(connection, tmp_path, monkeypatch):
+    uploads = []
+    monkeypatch.setattr(mikecloudio.request, "upload_file", lambda transport, url, path: uploads.append(url))
+    path = tmp_path / "data.csv"
+    path.write_text("timestamp,value\n")
+    cached = connection.upload_url
+
+    status = connection.import_file(path, "CsvReader", "TimeseriesWriter", wait=False)
+
+    assert "id" in status
+    assert len(uploads) == 1 and uploads[0] != cached
+    assert connection.upload_url == cached
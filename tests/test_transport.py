@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+import requests
+
+from mikecloudio.exceptions import RequestFailedError, ServiceUnavailableError
+from mikecloudio.transport import CircuitBreaker, Transport
+
+
+def test_upload_rejected_with_500_is_not_retried(service, connection):
+    service.add_timeseries("d1", "t1")
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1")
+    service.failures["upload"] = 500
+
+    with pytest.raises(RequestFailedError):
+        ts.add_data(pd.DataFrame({"value": [1.0]}, index=pd.DatetimeIndex(["2020-01-01"])))
+
+    assert service.requests["upload"] == 1
+    assert connection.transport.circuit_breaker.state == "closed"
+
+
+def test_unavailable_service_is_retried(service, connection):
+    service.add_timeseries("d1", "t1", rows=10)
+    service.error_rate = 1.0
+    ts = connection.get_ds(id="d1", lazy=True).get_ts(id="t1", lazy=True)
+
+    with pytest.raises(ServiceUnavailableError):
+        ts.get_data()
+
+    assert service.requests["error"] == connection.transport.retry_policy.max_retries + 1
+
+
+def test_trial_request_failing_without_response_releases_the_circuit(service):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.0)
+    breaker.record_failure()
+    transport = Transport(circuit_breaker=breaker)
+
+    with pytest.raises(requests.exceptions.InvalidURL):
+        transport.send("GET", "http://")
+    response = transport.send("GET", service.url + "/api/project/" + service.project_id)
+
+    assert response.status_code != 503
+    assert breaker.state == "closed"
@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from mikecloudio.upload import UploadJournal, iter_chunks, upload_chunks
+
+
+def frame(rows):
+    return pd.DataFrame({"value": range(rows)}, index=pd.date_range("2020-01-01", periods=rows, freq="min"))
+
+
+def encode(chunk):
+    return chunk
+
+
+@pytest.mark.parametrize("max_workers, encode_workers", [(1, 1), (4, 2)])
+def test_upload_chunks_sends_every_chunk(max_workers, encode_workers):
+    sent = []
+    lock = threading.Lock()
+
+    def send(body):
+        with lock:
+            sent.append(body)
+
+    result = upload_chunks(encode, send, iter_chunks(frame(100), 7), 100, max_workers, encode_workers)
+
+    assert result == 100
+    pd.testing.assert_frame_equal(pd.concat(sent).sort_index(), frame(100))
+
+
+def test_upload_chunks_reports_progress():
+    progress = []
+
+    upload_chunks(encode, lambda body: None, iter_chunks(frame(10), 4), 10, progress=lambda *p: progress.append(p))
+
+    assert progress == [(4, 10), (8, 10), (10, 10)]
+
+
+def test_upload_chunks_stops_after_failure_and_ends_its_threads():
+    threads = threading.active_count()
+    sent = []
+
+    def send(body):
+        if body.index[0] == pd.Timestamp("2020-01-01 00:20:00"):
+            raise RuntimeError("upload failed")
+        sent.append(body)
+
+    with pytest.raises(RuntimeError, match="upload failed"):
+        upload_chunks(encode, send, iter_chunks(frame(1000), 10), 1000)
+
+    assert len(sent) < 100
+    time.sleep(0.2)
+    assert threading.active_count() == threads
+
+
+def test_upload_chunks_raises_encoding_errors():
+    def failing(chunk):
+        raise ValueError("cannot encode")
+
+    with pytest.raises(ValueError, match="cannot encode"):
+        upload_chunks(failing, lambda body: None, iter_chunks(frame(100), 10), 100, max_workers=2)
+
+
+def test_upload_chunks_raises_errors_of_the_chunk_source():
+    def chunks():
+        yield frame(10)
+        raise OSError("cannot read")
+
+    with pytest.raises(OSError, match="cannot read"):
+        upload_chunks(encode, lambda body: None, chunks(), None)
+
+
+def test_upload_chunks_resumes_from_journal(tmp_path):
+    path = tmp_path / "journal"
+    attempts = []
+
+    def interrupted(body):
+        attempts.append(body)
+        if len(attempts) == 3:
+            raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        upload_chunks(encode, interrupted, iter_chunks(frame(50), 10), 50, journal=UploadJournal(path))
+    attempts.clear()
+
+    sent = upload_chunks(encode, attempts.append, iter_chunks(frame(50), 10), 50, journal=UploadJournal(path))
+
+    assert sent == 30
+    assert [body.index[0] for body in attempts] == list(frame(50).index[20::10])
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from mikecloudio.wrang import partition_df, splitDF
+
+
+def test_splitDF_returns_editable_dict():
+    df = pd.DataFrame({"station": ["a", "b", "a"], "value": [1.0, 2.0, 3.0]}, index=[10, 11, 12])
+
+    parts, keys = splitDF(df, "station")
+    parts["a"]["value"] = 0.0
+    parts["c"] = df.iloc[:0]
+
+    assert type(parts) is dict
+    assert keys == ["a", "b"]
+    assert list(parts["a"]["value"]) == [0.0, 0.0]
+    assert list(parts["a"]["index"]) == [10, 12]
+    assert list(df["value"]) == [1.0, 2.0, 3.0]
+
+
+def test_partition_df_keeps_rows_of_every_key_in_order():
+    df = pd.DataFrame({"key": ["b", "a", "b", "c", "a"], "value": range(5)})
+
+    partitions = partition_df(df, "key")
+
+    assert list(partitions) == ["b", "a", "c"]
+    assert partitions.sizes() == {"b": 2, "a": 2, "c": 1}
+    assert list(partitions["a"]["value"]) == [1, 4]
+    assert list(partitions["a"].index) == [1, 4]
+    assert list(partitions["b"]["value"]) == [0, 2]
+
+
+def test_partition_df_slices_contiguous_keys():
+    df = pd.DataFrame({"key": ["a", "a", "b"], "value": [1, 2, 3]})
+
+    part = partition_df(df, "key", reset_index=True)["b"]
+
+    assert list(part.columns) == ["index", "key", "value"]
+    assert list(part["index"]) == [2]
+
+
+def test_partition_df_of_empty_frame():
+    assert len(partition_df(pd.DataFrame({"key": [], "value": []}), "key")) == 0